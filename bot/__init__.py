@@ -4,12 +4,18 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
+from .throttling import ThrottlingRequestMiddleware
+
 OWNER_ID = os.getenv("OWNER_ID", None)
+# deleteMessages принимает не больше 100 ID сообщений за вызов
+DELETE_MESSAGES_LIMIT = 100
 
 bot = Bot(
     token=os.getenv("BOT_TOKEN", ""),
     default=DefaultBotProperties(parse_mode=ParseMode.HTML),
 )
+# Все исходящие запросы проходят через лимиты Bot API
+bot.session.middleware(ThrottlingRequestMiddleware())
 
 dp = Dispatcher()
 
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import time
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage,
+    DeleteMessage,
+    DeleteMessages,
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    ForwardMessage,
+    Response,
+    SendAnimation,
+    SendAudio,
+    SendDocument,
+    SendMediaGroup,
+    SendMessage,
+    SendPhoto,
+    SendVideo,
+    SendVoice,
+    TelegramMethod,
+)
+from aiogram.methods.base import TelegramType
+
+# Лимиты Bot API: ~30 сообщений в секунду на бота,
+# 1 сообщение в секунду в личный чат и 20 сообщений в минуту в группу/канал
+GLOBAL_RATE = float(os.getenv("THROTTLE_GLOBAL_RATE", "30"))
+PRIVATE_CHAT_RATE = float(os.getenv("THROTTLE_PRIVATE_CHAT_RATE", "1"))
+GROUP_CHAT_RATE = float(os.getenv("THROTTLE_GROUP_CHAT_RATE_PER_MINUTE", "20")) / 60
+MAX_RETRIES = int(os.getenv("THROTTLE_MAX_RETRIES", "5"))
+
+# Методы, которые создают или изменяют сообщения и попадают под лимиты
+THROTTLED_METHODS = (
+    SendMessage,
+    SendPhoto,
+    SendVideo,
+    SendAnimation,
+    SendAudio,
+    SendDocument,
+    SendVoice,
+    SendMediaGroup,
+    CopyMessage,
+    ForwardMessage,
+    EditMessageText,
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+)
+
+# Удаление сообщений не ограничено лимитами чата, но учитывается в общем лимите
+GLOBAL_ONLY_METHODS = (DeleteMessage, DeleteMessages)
+
+# Бакеты чатов, не использованные дольше этого времени, удаляются
+IDLE_BUCKET_TTL = 600
+MAX_CHAT_BUCKETS = 10000
+
+
+class TokenBucket:
+    """
+    Token bucket: rate токенов в секунду, не более capacity накопленных.
+    Ожидающие получают токены в порядке очереди.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block(self, seconds: float) -> None:
+        """
+        Блокирует бакет на seconds секунд (retry_after от Telegram).
+        """
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    def is_idle(self, now: float) -> bool:
+        return (
+            not self._lock.locked()
+            and now >= self.blocked_until
+            and now - self.updated_at > IDLE_BUCKET_TTL
+        )
+
+
+class ThrottlingRequestMiddleware(BaseRequestMiddleware):
+    """
+    Пропускает исходящие сообщения через глобальный бакет и бакет чата,
+    а при 429 Flood Control ждёт retry_after и повторяет запрос.
+    """
+
+    def __init__(self) -> None:
+        self.global_bucket = TokenBucket(GLOBAL_RATE, capacity=GLOBAL_RATE)
+        self.chat_buckets: dict[str, TokenBucket] = {}
+
+    def get_chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        key = str(chat_id)
+        bucket = self.chat_buckets.get(key)
+        if bucket is None:
+            if len(self.chat_buckets) >= MAX_CHAT_BUCKETS:
+                self.prune_chat_buckets()
+            # Отрицательные ID и @username - группы и каналы
+            rate = PRIVATE_CHAT_RATE if key.isdigit() else GROUP_CHAT_RATE
+            bucket = TokenBucket(rate)
+            self.chat_buckets[key] = bucket
+        return bucket
+
+    def prune_chat_buckets(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, b in self.chat_buckets.items() if b.is_idle(now)]:
+            del self.chat_buckets[key]
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not isinstance(method, THROTTLED_METHODS + GLOBAL_ONLY_METHODS):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        chat_bucket = (
+            self.get_chat_bucket(chat_id)
+            if chat_id is not None and isinstance(method, THROTTLED_METHODS)
+            else None
+        )
+
+        attempt = 0
+        while True:
+            if chat_bucket:
+                await chat_bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    raise
+                print(
+                    f"Flood control for {type(method).__name__} in chat {chat_id}, "
+                    f"retry in {e.retry_after}s ({attempt}/{MAX_RETRIES})"
+                )
+                (chat_bucket or self.global_bucket).block(e.retry_after)
@@ -220,7 +220,14 @@ def get_remove_post_interval_keyboard(
     return InlineKeyboardMarkup(inline_keyboard=inline_kb_list)
 
 
-def get_created_post_keyboard(post: Post) -> InlineKeyboardMarkup:
+def get_created_post_keyboard(
+    post: Post, reaction_counts: dict[int, int] | None = None
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура опубликованного поста.
+    :param reaction_counts: Актуальные счётчики реакций по ID (из кэша),
+        если не переданы - берутся из post.post_reaction_buttons.
+    """
 
     ikb = InlineKeyboardBuilder()
     ikb_reaction = InlineKeyboardBuilder()
@@ -228,13 +235,14 @@ def get_created_post_keyboard(post: Post) -> InlineKeyboardMarkup:
 
     if post.post_reaction_buttons:
         for reaction in post.post_reaction_buttons:
+            count = (reaction_counts or {}).get(reaction.id, reaction.reactions_count)
             ikb_reaction.button(
-                text=f"{reaction.text} {len(reaction.reactions) if len(reaction.reactions) > 0 else ''}",
+                text=f"{reaction.text} {count if count > 0 else ''}",
                 callback_data=EmojiButtonData(
                     action="add_reaction",
                     post_id=post.id,
                     id=reaction.id,
-                    text=f"{reaction.text} {len(reaction.reactions)}",
+                    text=f"{reaction.text} {count}",
                     type="emoji_action",
                 ).pack(),
             )
@@ -530,6 +538,22 @@ def get_general_settings_keyboard(data: Dict[str, Any]) -> InlineKeyboardMarkup:
                 ).pack(),
             )
         ],
+        [
+            InlineKeyboardButton(
+                text="⏱ Разнесение публикаций",
+                callback_data=GeneralSettingsButtonData(
+                    action="show_schedule_spread", type="general_settings_action"
+                ).pack(),
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="🌍 Часовой пояс",
+                callback_data=GeneralSettingsButtonData(
+                    action="show_timezone", type="general_settings_action"
+                ).pack(),
+            )
+        ],
         (
             [
                 InlineKeyboardButton(
@@ -546,6 +570,23 @@ def get_general_settings_keyboard(data: Dict[str, Any]) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=inline_kb_list)
 
 
+def get_general_settings_back_keyboard() -> InlineKeyboardMarkup:
+    """
+    Возвращает маркап клавиатуры возврата в общие настройки
+    """
+    inline_kb_list = [
+        [
+            InlineKeyboardButton(
+                text="‹ Назад",
+                callback_data=GeneralSettingsButtonData(
+                    action="back", type="general_settings_action"
+                ).pack(),
+            )
+        ]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=inline_kb_list)
+
+
 def get_post_multiposting_keyboard(data: Dict[str, Any]) -> InlineKeyboardMarkup:
     """
     Возвращает маркап клавиатуры для мультипостинга
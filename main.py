@@ -8,14 +8,30 @@ from dotenv import load_dotenv
 load_dotenv(".env.app")
 
 from bot import bot, dp
-from models import create_all
-from routes import base_router, post_router, user_router
+from models import create_all, get_session
+from repositories import PostRepository
+from routes import DatabaseMiddleware, base_router, post_router, user_router
+from utils.delivery import PROCESS_ROLE
+from utils.reactions import reaction_tally_cache
 from utils.scheduler import start_scheduler
 
 
 async def main() -> None:
-    create_all()
-    start_scheduler()
+    await create_all()
+    # Голоса из устаревшего JSON поля reactions переносятся в reaction_votes
+    # до того, как кеш реакций начнёт читать счётчики
+    async with get_session() as session:
+        migrated = await PostRepository(session).migrate_legacy_reactions()
+    if migrated:
+        print(f"Legacy reactions migrated: {migrated} votes")
+    # История сообщений из устаревших JSON полей messages_ids нужна поиску
+    # поста по пересланному сообщению и удалению сразу после деплоя
+    async with get_session() as session:
+        migrated = await PostRepository(session).migrate_legacy_messages()
+    if migrated:
+        print(f"Legacy post messages migrated: {migrated} messages")
+    # В режиме bot задачи запускает отдельный процесс worker.py
+    start_scheduler(run_jobs=PROCESS_ROLE != "bot")
     await bot.set_my_commands(
         commands=[
             BotCommand(command="/start", description="Запутить или перезапустить бота"),
@@ -28,6 +44,9 @@ async def main() -> None:
         ]
     )
 
+    dp.update.outer_middleware(DatabaseMiddleware())
+    # Незаписанные голоса реакций сохраняются при остановке бота
+    dp.shutdown.register(reaction_tally_cache.flush)
     dp.include_routers(base_router, post_router, user_router)
     await bot.delete_webhook(drop_pending_updates=True)
     await dp.start_polling(bot, close_bot_session=True)
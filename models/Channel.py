@@ -15,8 +15,12 @@ class Channel(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     user: Mapped["User"] = relationship(back_populates="channels")
     type: Mapped[str] = mapped_column(String(20))
+    # Устарело: история сообщений хранится в post_messages, поле не загружается
     messages_ids: Mapped[list] = mapped_column(
-        MutableList.as_mutable(JSON), nullable=False, default=list  # type: ignore
+        MutableList.as_mutable(JSON),  # type: ignore
+        nullable=False,
+        default=list,
+        deferred=True,
     )
     posts: Mapped[List["Post"]] = relationship(
         secondary=association_table, back_populates="channels"
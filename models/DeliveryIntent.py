@@ -0,0 +1,37 @@
+import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class DeliveryIntent(Base):
+    """
+    Outbox рассылки поста: строка канала пишется (sending) перед самой
+    отправкой в канал и отмечается sent/failed вместе с post_messages.
+    sending после падения процесса - канал мог получить пост, но запись
+    о доставке потеряна; повтор того же запуска (run_id) такие каналы
+    пропускает, а каналы без строки отправляет.
+    """
+
+    __tablename__ = "delivery_intents"
+    __table_args__ = (
+        UniqueConstraint(
+            "post_id", "run_id", "chat_id", name="uq_delivery_intents_run_chat"
+        ),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), nullable=False
+    )
+    # Запуск рассылки: задача очереди доставки или разовая отправка
+    run_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    chat_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    # sending, sent, failed; unknown - sending, пропущенный при повторе
+    status: Mapped[str] = mapped_column(String(10), nullable=False)
+    message_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    # Сколько раз запуск отправлял пост в канал
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    # UTC
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
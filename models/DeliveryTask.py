@@ -0,0 +1,25 @@
+import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class DeliveryTask(Base):
+    """
+    Очередь доставки постов для режима с отдельным воркером:
+    планировщик и хендлеры ставят задачи, воркеры забирают их
+    (SELECT ... FOR UPDATE SKIP LOCKED) и отправляют пост.
+    """
+
+    __tablename__ = "delivery_tasks"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), nullable=False
+    )
+    # UTC; у забранной задачи - время, после которого её можно забрать снова
+    available_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=False, index=True
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,39 @@
+import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class DispatchSlot(Base):
+    """
+    Расписание рассылки поста для режима DISPATCH_MODE=bucketed:
+    вместо задачи APScheduler на каждый интервал - строка с временем
+    следующей отправки, которую выбирает общий поминутный тик.
+    """
+
+    __tablename__ = "dispatch_slots"
+    __table_args__ = (Index("ix_dispatch_slots_user_id_post_id", "user_id", "post_id"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Тот же ID, что был бы у задачи APScheduler (JobKey.job_id)
+    job_id: Mapped[str] = mapped_column(String(191), unique=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), nullable=False
+    )
+    # interval (hour/minute - длительность) или cron (hour/minute - время суток)
+    trigger_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    hour: Mapped[int] = mapped_column(Integer, nullable=False)
+    minute: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Сдвиг времени cron-запуска при разнесении (сек.)
+    run_offset: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    timezone: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Даты в UTC
+    start_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
+    end_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
+    next_run_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=False, index=True
+    )
@@ -11,6 +11,8 @@ class MediaFile(Base):
     media_file_name: Mapped[str] = mapped_column(String(255))
     media_file_type: Mapped[str] = mapped_column(String(255))
     media_file_position: Mapped[str] = mapped_column(String(255))
+    # file_id Telegram после первой загрузки, дальше файл отправляется по нему
+    media_file_id: Mapped[str] = mapped_column(String(255), nullable=True)
     post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"))
     post: Mapped["Post"] = relationship(back_populates="post_media_file")
     is_archived: Mapped[bool] = mapped_column(Boolean, default=False)
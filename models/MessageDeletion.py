@@ -0,0 +1,26 @@
+import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class MessageDeletion(Base):
+    """
+    Очередь автоудаления сообщений: воркер удаляет сообщения,
+    у которых наступило remove_at.
+    """
+
+    __tablename__ = "message_deletions"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), nullable=True
+    )
+    chat_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    message_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # UTC
+    remove_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=False, index=True
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
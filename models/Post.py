@@ -5,6 +5,7 @@ from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base, association_table
+from .TimeFrame import TimeFrame
 
 
 class Post(Base):
@@ -31,8 +32,12 @@ class Post(Base):
         Boolean, default=False
     )  # Autosignature post
     is_archived: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Устарело: история сообщений хранится в post_messages, поле не загружается
     messages_ids: Mapped[list] = mapped_column(
-        MutableList.as_mutable(JSON), nullable=True, default=list  # type: ignore
+        MutableList.as_mutable(JSON),  # type: ignore
+        nullable=True,
+        default=list,
+        deferred=True,
     )
     auto_remove_datetime: Mapped[str] = mapped_column(
         String(100), nullable=True, default="48h"
@@ -40,9 +45,21 @@ class Post(Base):
     time_frames: Mapped[List[str]] = mapped_column(
         MutableList.as_mutable(JSON), nullable=True, default=list  # type: ignore
     )
+    # Те же интервалы в разобранном виде: [trigger_type, hour, minute]
+    time_frame_specs: Mapped[List[list]] = mapped_column(JSON, nullable=True)
     auto_repeat_dates: Mapped[List[str]] = mapped_column(
         MutableList.as_mutable(JSON), nullable=True, default=list  # type: ignore
     )
     created_at: Mapped[str] = mapped_column(
         String(100), server_default=func.now(), nullable=False
     )
+
+    @property
+    def time_frame_list(self) -> List[TimeFrame]:
+        """
+        Интервалы поста; у старых постов без time_frame_specs
+        разбираются строки time_frames.
+        """
+        if self.time_frame_specs is not None:
+            return [TimeFrame(*spec) for spec in self.time_frame_specs]
+        return TimeFrame.parse_all(self.time_frames)
@@ -0,0 +1,27 @@
+import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class PostMessage(Base):
+    """
+    Сообщение, отправленное ботом в канал при рассылке поста.
+    Индекс (chat_id, message_id) - поиск поста по пересланному сообщению.
+    """
+
+    __tablename__ = "post_messages"
+    __table_args__ = (
+        Index("ix_post_messages_chat_id_message_id", "chat_id", "message_id"),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), index=True
+    )
+    chat_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    message_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    sent_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
@@ -11,6 +11,13 @@ class PostReactioButton(Base):
     post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"))
     post: Mapped["Post"] = relationship(back_populates="post_reaction_buttons")
     text: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Устарело: голоса хранятся в reaction_votes, поле не загружается
     reactions: Mapped[list] = mapped_column(
-        MutableList.as_mutable(JSON), nullable=False, default=list  # type: ignore
+        MutableList.as_mutable(JSON),  # type: ignore
+        nullable=False,
+        default=list,
+        deferred=True,
+    )
+    reactions_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
     )
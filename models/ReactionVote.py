@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class ReactionVote(Base):
+    """
+    Голос пользователя за реакцию поста: не больше одного голоса на пост.
+    """
+
+    __tablename__ = "reaction_votes"
+    __table_args__ = (
+        UniqueConstraint("post_id", "user_id", name="uq_reaction_votes_post_user"),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id", ondelete="CASCADE"))
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    reaction_id: Mapped[int] = mapped_column(
+        ForeignKey("posts_reaction_buttons.id", ondelete="CASCADE")
+    )
@@ -0,0 +1,31 @@
+import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class ScheduledJob(Base):
+    """
+    Реестр задач APScheduler с типизированными полями: владелец, пост,
+    вид задачи, параметры триггера и время следующего запуска.
+    Заполняется jobstore-ом при добавлении, изменении и удалении задач.
+    """
+
+    __tablename__ = "scheduled_jobs"
+    __table_args__ = (Index("ix_scheduled_jobs_user_id_post_id", "user_id", "post_id"),)
+    # 191 - как у id в таблице apscheduler_jobs
+    job_id: Mapped[str] = mapped_column(String(191), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    post_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    # send - рассылка, stop - остановка рассылки, remove - удаление сообщения
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    # interval или cron, для remove - None
+    trigger_type: Mapped[str] = mapped_column(String(20), nullable=True)
+    hour: Mapped[int] = mapped_column(Integer, nullable=True)
+    minute: Mapped[int] = mapped_column(Integer, nullable=True)
+    # UTC, None - задача на паузе
+    next_run_time: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=True, index=True
+    )
@@ -0,0 +1,20 @@
+import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class SchedulerLease(Base):
+    """
+    Аренда роли ведущего планировщика: задачи запускает только процесс,
+    который держит аренду и продлевает её раньше expires_at.
+    """
+
+    __tablename__ = "scheduler_leases"
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # ID процесса-владельца (хост:pid или INSTANCE_ID)
+    holder: Mapped[str] = mapped_column(String(191), nullable=False)
+    # UTC
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,87 @@
+import re
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+
+# Время суток: HH:MM
+CRON_RE = re.compile(r"^(\d{1,2}):(\d{2})$")
+# Интервал: Xh Ym (любая из частей может отсутствовать)
+INTERVAL_RE = re.compile(r"(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?")
+
+
+class TimeFrame(NamedTuple):
+    """
+    Время рассылки поста: cron - ежедневно в hour:minute,
+    interval - каждые hour ч. minute мин. Совпадает с кортежем
+    (trigger_type, hour, minute), по которому ищутся задачи и слоты.
+    """
+
+    trigger_type: str
+    hour: int
+    minute: int
+
+    @classmethod
+    def parse(cls, value: "str | TimeFrame") -> "TimeFrame":
+        if isinstance(value, TimeFrame):
+            return value
+        return parse_time_frame(value)
+
+    @classmethod
+    def parse_all(cls, values: Iterable["str | TimeFrame"] | None) -> list["TimeFrame"]:
+        """
+        Разбирает список интервалов, пропуская некорректные.
+        """
+        time_frames = []
+        for value in values or []:
+            try:
+                time_frames.append(cls.parse(value))
+            except ValueError as e:
+                print(f"Error parsing time frame '{value}': {e}")
+        return time_frames
+
+    @property
+    def trigger_params(self) -> dict[str, int]:
+        """
+        Параметры CronTrigger или IntervalTrigger.
+        """
+        if self.trigger_type == "cron":
+            return {"hour": self.hour, "minute": self.minute}
+        return {"hours": self.hour, "minutes": self.minute}
+
+    def to_spec(self) -> list:
+        """
+        Структурированная форма для JSON колонок (time_frame_specs).
+        """
+        return [self.trigger_type, self.hour, self.minute]
+
+    def __str__(self) -> str:
+        if self.trigger_type == "cron":
+            return f"{self.hour:02d}:{self.minute:02d}"
+        parts = [f"{self.hour}h"] if self.hour else []
+        if self.minute:
+            parts.append(f"{self.minute}m")
+        return " ".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def parse_time_frame(value: str) -> TimeFrame:
+    """
+    Разбирает строку интервала (HH:MM или Xh Ym). Результат кешируется:
+    одни и те же строки разбираются при каждом планировании и поиске задач.
+    :param value: Строка интервала.
+    """
+    value = value.strip()
+
+    match = CRON_RE.match(value)
+    if match:
+        return TimeFrame("cron", int(match.group(1)), int(match.group(2)))
+
+    match = INTERVAL_RE.match(value)
+    hours = int(match.group(1)) if match.group(1) else 0
+    minutes = int(match.group(2)) if match.group(2) else 0
+    if not hours and not minutes:
+        raise ValueError(f"Invalid schedule format: {value}")
+    return TimeFrame("interval", hours, minutes)
+
+
+def to_time_frame_specs(values: Iterable["str | TimeFrame"] | None) -> list[list]:
+    return [time_frame.to_spec() for time_frame in TimeFrame.parse_all(values)]
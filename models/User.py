@@ -1,10 +1,30 @@
+import os
+import zoneinfo
+from functools import lru_cache
 from typing import List
 
-from sqlalchemy import BigInteger, Boolean, Integer, String
+from sqlalchemy import BigInteger, Boolean, Integer, String, false
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
 
+# Часовой пояс новых пользователей и системных задач
+DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE", "Europe/Kyiv")
+
+
+@lru_cache(maxsize=None)
+def get_zoneinfo(timezone: str | None) -> zoneinfo.ZoneInfo:
+    """
+    Возвращает ZoneInfo по имени часового пояса (объекты кешируются).
+    Неизвестный пояс заменяется на DEFAULT_TIMEZONE.
+    :param timezone: Имя часового пояса, например Europe/Kyiv.
+    """
+    try:
+        return zoneinfo.ZoneInfo(timezone or DEFAULT_TIMEZONE)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError) as e:
+        print(f"Unknown timezone {timezone}: {e}")
+        return zoneinfo.ZoneInfo(DEFAULT_TIMEZONE)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -17,4 +37,19 @@ class User(Base):
     multipostings: Mapped[List["Multiposting"]] = relationship(back_populates="user")
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
     is_banned: Mapped[bool] = mapped_column(Boolean, default=False)
-    timezone: Mapped[str] = mapped_column(String(255), default="UTC")
+    timezone: Mapped[str] = mapped_column(String(255), default=DEFAULT_TIMEZONE)
+    # Пояс выбран пользователем в настройках. Регистрация раньше записывала
+    # "UTC" без выбора, у таких строк флаг false и действует DEFAULT_TIMEZONE
+    timezone_selected: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+    # Окно разнесения запусков постов (мин.), None - SCHEDULE_SPREAD_MINUTES
+    schedule_spread_minutes: Mapped[int] = mapped_column(Integer, nullable=True)
+
+    @property
+    def effective_timezone(self) -> str:
+        return self.timezone if self.timezone_selected else DEFAULT_TIMEZONE
+
+    @property
+    def tzinfo(self) -> zoneinfo.ZoneInfo:
+        return get_zoneinfo(self.effective_timezone)
@@ -0,0 +1,102 @@
+import datetime
+import os
+
+from sqlalchemy import delete, select, update
+
+from models import DeliveryTask
+
+from .base import BaseRepository
+
+# Через сколько секунд задачу, забранную упавшим воркером, можно забрать снова
+DELIVERY_TASK_TIMEOUT = int(os.getenv("DELIVERY_TASK_TIMEOUT", "600"))
+# Сколько раз задача доставки забирается, прежде чем её отбросить
+DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "3"))
+# Через сколько секунд повторять доставку после ошибки
+DELIVERY_RETRY_DELAY = int(os.getenv("DELIVERY_RETRY_DELAY", "60"))
+
+
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class DeliveryRepository(BaseRepository):
+    async def enqueue(self, post_ids: list[int]) -> None:
+        """
+        Ставит посты в очередь доставки.
+        :param post_ids: ID постов.
+        """
+        now = utcnow()
+        self.session.add_all(
+            [DeliveryTask(post_id=post_id, available_at=now) for post_id in post_ids]
+        )
+        await self.session.commit()
+
+    async def claim(self, limit: int) -> list[DeliveryTask]:
+        """
+        Забирает доступные задачи доставки. Задачи, которые держит другой
+        воркер, пропускаются; забранные откладываются на DELIVERY_TASK_TIMEOUT,
+        чтобы после падения воркера их доставил другой.
+        :param limit: Сколько задач забрать.
+        """
+        now = utcnow()
+        tasks = (
+            (
+                await self.session.execute(
+                    select(DeliveryTask)
+                    .where(DeliveryTask.available_at <= now)
+                    .order_by(DeliveryTask.available_at)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        claimed, dropped_ids = [], []
+        for task in tasks:
+            if task.attempts >= DELIVERY_MAX_ATTEMPTS:
+                print(
+                    f"Delivery of post {task.post_id} dropped after {task.attempts} attempts"
+                )
+                dropped_ids.append(task.id)
+                continue
+            task.attempts += 1
+            task.available_at = now + datetime.timedelta(seconds=DELIVERY_TASK_TIMEOUT)
+            claimed.append(task)
+        if dropped_ids:
+            await self.session.execute(
+                delete(DeliveryTask).where(DeliveryTask.id.in_(dropped_ids))
+            )
+        await self.session.commit()
+        return claimed
+
+    async def extend(self, task_id: int) -> None:
+        """
+        Продлевает задачу, которую воркер ещё доставляет, чтобы её
+        не забрал другой воркер по истечении DELIVERY_TASK_TIMEOUT.
+        """
+        await self.session.execute(
+            update(DeliveryTask)
+            .where(DeliveryTask.id == task_id)
+            .values(
+                available_at=utcnow()
+                + datetime.timedelta(seconds=DELIVERY_TASK_TIMEOUT)
+            )
+        )
+        await self.session.commit()
+
+    async def complete(self, task_id: int) -> None:
+        await self.session.execute(
+            delete(DeliveryTask).where(DeliveryTask.id == task_id)
+        )
+        await self.session.commit()
+
+    async def retry_later(self, task_id: int) -> None:
+        """
+        Возвращает задачу в очередь через DELIVERY_RETRY_DELAY.
+        """
+        task = await self.session.get(DeliveryTask, task_id)
+        if not task:
+            return
+        task.available_at = utcnow() + datetime.timedelta(seconds=DELIVERY_RETRY_DELAY)
+        await self.session.commit()
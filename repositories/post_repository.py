@@ -1,35 +1,105 @@
+import asyncio
 import datetime
-import zoneinfo
+import os
+import uuid
 from typing import Any, Callable
 
 from aiogram import html
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import FSInputFile
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from sqlalchemy import String, cast, select
+from sqlalchemy import (
+  String,
+  bindparam,
+  cast,
+  delete,
+  func,
+  select,
+  tuple_,
+  update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
-from bot import bot
+from bot import DELETE_MESSAGES_LIMIT, bot
 from keyboard.keyboard import EmojiButtonData
 from models import (
   Channel,
+  DeliveryIntent,
   MediaFile,
+  MessageDeletion,
   Post,
   PostKeyboard,
+  PostMessage,
   PostReactioButton,
   PostSchedule,
+  ReactionVote,
   User,
 )
+from models.TimeFrame import to_time_frame_specs
 
 from .base import BaseRepository
 
+# Сколько каналов обрабатывается одновременно при рассылке поста
+DELIVERY_CONCURRENCY = int(os.getenv("DELIVERY_CONCURRENCY", "10"))
+# Сколько записей о доставке накапливается перед одним коммитом
+DELIVERY_COMMIT_BATCH_SIZE = int(os.getenv("DELIVERY_COMMIT_BATCH_SIZE", "50"))
+# Сколько секунд хранить outbox прерванного запуска рассылки для его повтора
+DELIVERY_INTENT_TTL = int(os.getenv("DELIVERY_INTENT_TTL", "86400"))
+# Сколько дней хранить записи post_messages об отправленных сообщениях
+POST_MESSAGES_RETENTION_DAYS = int(os.getenv("POST_MESSAGES_RETENTION_DAYS", "90"))
+# Сколько сообщений из очереди автоудаления обрабатывается за один проход
+DELETION_BATCH_SIZE = int(os.getenv("DELETION_BATCH_SIZE", "500"))
+# Сколько раз повторять неудачное удаление и через сколько секунд
+DELETION_MAX_ATTEMPTS = int(os.getenv("DELETION_MAX_ATTEMPTS", "3"))
+DELETION_RETRY_DELAY = int(os.getenv("DELETION_RETRY_DELAY", "300"))
+# Через сколько секунд пачка, забранная на удаление, снова доступна
+# (если забравший её процесс упал, не записав итоги)
+DELETION_CLAIM_TIMEOUT = int(os.getenv("DELETION_CLAIM_TIMEOUT", "600"))
+
 
 class PostRepository(BaseRepository):
-    def get_by_id(self, post_id: int) -> Post | None:
+    async def get_by_id(self, post_id: int) -> Post | None:
+        """
+        Возвращает пост по его ID вместе со связанными объектами
+        (в async сессии ленивая загрузка связей недоступна).
+        :param post_id: ID поста.
+        :return: Пост или None, если пост не найден.
+        """
+        result = await self.session.execute(
+            select(Post)
+            .where(Post.id == post_id)
+            .options(
+                selectinload(Post.user),
+                selectinload(Post.channels),
+                selectinload(Post.post_media_file),
+                selectinload(Post.post_keyboards),
+                selectinload(Post.post_reaction_buttons),
+                selectinload(Post.post_schedule),
+            )
+        )
+        return result.scalar()
+
+    async def get_post_for_delivery(self, post_id: int) -> Post | None:
         """
-        Возвращает пост по его ID.
+        Загружает пост со всем, что нужно для рассылки, за два запроса:
+        автор, медиа, реакции и кнопки - одним JOIN (их немного),
+        каналы - отдельным SELECT ... IN, чтобы не умножать строки JOIN.
         :param post_id: ID поста.
         :return: Пост или None, если пост не найден.
         """
-        return self.session.execute(select(Post).where(Post.id == post_id)).scalar()
+        result = await self.session.execute(
+            select(Post)
+            .where(Post.id == post_id)
+            .options(
+                joinedload(Post.user),
+                joinedload(Post.post_media_file),
+                joinedload(Post.post_keyboards),
+                joinedload(Post.post_reaction_buttons),
+                selectinload(Post.channels),
+            )
+        )
+        return result.unique().scalar()
 
     async def remove_post(self, post_id: int, chat_id: str, message_id: int) -> bool:
         """
@@ -39,7 +109,7 @@ class PostRepository(BaseRepository):
         :param message_id: ID сообщения.
         """
         try:
-            post = self.get_by_id(post_id)
+            post = await self.get_by_id(post_id)
             if not post:
                 print(f"Post with ID {post_id} not found")
                 return False
@@ -50,18 +120,360 @@ class PostRepository(BaseRepository):
             print(f"Error removing post: {e}")
             return False
 
+    async def delete_due_messages(self, now: datetime.datetime) -> int:
+        """
+        Удаляет сообщения из очереди автоудаления, у которых наступило
+        remove_at, пачками по DELETION_BATCH_SIZE (в Telegram - через
+        deleteMessages, до DELETE_MESSAGES_LIMIT сообщений чата за вызов).
+        Пачка сначала забирается коротким коммитом (remove_at сдвигается на
+        DELETION_CLAIM_TIMEOUT), Telegram вызывается без блокировок строк,
+        итоги записываются вторым коммитом. Пачка процесса, упавшего
+        до записи итогов, снова станет доступна через DELETION_CLAIM_TIMEOUT.
+        :param now: Текущее время (aware).
+        :return: Количество обработанных записей.
+        """
+        now_utc = now.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        processed = 0
+        while True:
+            try:
+                deletions = (
+                    await self.session.execute(
+                        select(
+                            MessageDeletion.id,
+                            MessageDeletion.chat_id,
+                            MessageDeletion.message_id,
+                            MessageDeletion.attempts,
+                        )
+                        .where(MessageDeletion.remove_at <= now_utc)
+                        .order_by(MessageDeletion.remove_at)
+                        .limit(DELETION_BATCH_SIZE)
+                        # Строки, которые забирает другой процесс, пропускаются
+                        .with_for_update(skip_locked=True)
+                    )
+                ).all()
+                if deletions:
+                    await self.session.execute(
+                        update(MessageDeletion)
+                        .where(
+                            MessageDeletion.id.in_(
+                                [deletion.id for deletion in deletions]
+                            )
+                        )
+                        .values(
+                            remove_at=now_utc
+                            + datetime.timedelta(seconds=DELETION_CLAIM_TIMEOUT)
+                        )
+                    )
+                await self.session.commit()
+            except Exception as e:
+                await self.session.rollback()
+                print(f"Error claiming message deletions: {e}")
+                return processed
+            if not deletions:
+                return processed
+
+            # deleteMessages удаляет до DELETE_MESSAGES_LIMIT сообщений одного чата
+            by_chat: dict[str, list] = {}
+            for deletion in deletions:
+                by_chat.setdefault(deletion.chat_id, []).append(deletion)
+            chunks = [
+                chat_deletions[i : i + DELETE_MESSAGES_LIMIT]
+                for chat_deletions in by_chat.values()
+                for i in range(0, len(chat_deletions), DELETE_MESSAGES_LIMIT)
+            ]
+            semaphore = asyncio.Semaphore(DELIVERY_CONCURRENCY)
+
+            async def delete_chunk(chunk: list) -> bool:
+                async with semaphore:
+                    try:
+                        await bot.delete_messages(
+                            chat_id=chunk[0].chat_id,
+                            message_ids=[deletion.message_id for deletion in chunk],
+                        )
+                        return True
+                    except TelegramBadRequest as e:
+                        # Чат недоступен или сообщения удалить нельзя - повторять незачем
+                        print(f"Messages in chat {chunk[0].chat_id} not deleted: {e}")
+                        return True
+                    except Exception as e:
+                        print(
+                            f"Error deleting messages in chat {chunk[0].chat_id}: {e}"
+                        )
+                        return False
+
+            results = await asyncio.gather(*[delete_chunk(chunk) for chunk in chunks])
+            done_ids = []
+            retry_ids = []
+            for chunk, deleted in zip(chunks, results):
+                for deletion in chunk:
+                    if deleted or deletion.attempts + 1 >= DELETION_MAX_ATTEMPTS:
+                        done_ids.append(deletion.id)
+                    else:
+                        retry_ids.append(deletion.id)
+            try:
+                if done_ids:
+                    await self.session.execute(
+                        delete(MessageDeletion).where(MessageDeletion.id.in_(done_ids))
+                    )
+                if retry_ids:
+                    await self.session.execute(
+                        update(MessageDeletion)
+                        .where(MessageDeletion.id.in_(retry_ids))
+                        .values(
+                            attempts=MessageDeletion.attempts + 1,
+                            remove_at=now_utc
+                            + datetime.timedelta(seconds=DELETION_RETRY_DELAY),
+                        )
+                    )
+                await self.session.commit()
+            except Exception as e:
+                await self.session.rollback()
+                print(f"Error updating message deletion queue: {e}")
+                return processed
+            processed += len(deletions)
+
+    async def _send_to_channel(
+        self,
+        post: Post,
+        channel: Channel,
+        payload: dict[str, Any],
+    ) -> dict[str, Any]:
+        """
+        Отправляет пост в один канал и возвращает результат доставки.
+        :param post: Пост, который нужно отправить.
+        :param channel: Канал получатель.
+        :param payload: Подготовленные данные сообщения.
+        """
+        result = {
+            "channel": channel,
+            "message": None,
+            "channel_members": None,
+            "media_file_id": None,
+            # Прочие сообщения доставки (chat_id, message_id): копия
+            # получателю и подпись
+            "extra_messages": [],
+        }
+        text = payload["text"]
+        reply_markup = payload["reply_markup"]
+        media_file_type = payload["media_file_type"]
+        media_file_path = payload["media_file_path"]
+        media_file_name = payload["media_file_name"]
+        media_file_position = payload["media_file_position"]
+        media_file_id = payload["media_file_id"]
+        try:
+            if media_file_type == "photo":
+                photo = media_file_id or FSInputFile(
+                    path=media_file_path, filename=media_file_name
+                )
+                message = await bot.send_photo(
+                    chat_id=channel.chat_id,
+                    photo=photo,
+                    caption=text,
+                    disable_notification=not post.sound,
+                    # protect_content=not post.comments,
+                    reply_markup=reply_markup,
+                    show_caption_above_media=(
+                        True if media_file_position == "bottom_preview" else False
+                    ),
+                )
+                result["message"] = message
+                result["media_file_id"] = message.photo[-1].file_id
+
+                if post.recipient_post_chat_id:
+                    copy = await bot.send_photo(
+                        chat_id=post.recipient_post_chat_id,
+                        photo=result["media_file_id"],
+                        caption=text,
+                        disable_notification=not post.sound,
+                        reply_markup=reply_markup,
+                    )
+                    result["extra_messages"].append(
+                        (post.recipient_post_chat_id, copy.message_id)
+                    )
+
+            elif media_file_type == "video":
+                video = media_file_id or FSInputFile(
+                    path=media_file_path, filename=media_file_name
+                )
+                message = await bot.send_video(
+                    chat_id=channel.chat_id,
+                    video=video,
+                    caption=text,
+                    disable_notification=not post.sound,
+                    reply_markup=reply_markup,
+                    # protect_content=not post.comments,
+                    show_caption_above_media=(
+                        True if media_file_position == "bottom_preview" else False
+                    ),
+                )
+                result["message"] = message
+                result["media_file_id"] = message.video.file_id
+
+                if post.recipient_post_chat_id:
+                    copy = await bot.send_video(
+                        chat_id=post.recipient_post_chat_id,
+                        video=result["media_file_id"],
+                        caption=text,
+                        disable_notification=not post.sound,
+                        reply_markup=reply_markup,
+                    )
+                    result["extra_messages"].append(
+                        (post.recipient_post_chat_id, copy.message_id)
+                    )
+
+            else:
+                message = await bot.send_message(
+                    chat_id=channel.chat_id,
+                    text=text,
+                    reply_markup=reply_markup,
+                )
+                result["message"] = message
+
+                if post.recipient_post_chat_id:
+                    copy = await bot.send_message(
+                        chat_id=post.recipient_post_chat_id,
+                        text=text,
+                        reply_markup=reply_markup,
+                    )
+                    result["extra_messages"].append(
+                        (post.recipient_post_chat_id, copy.message_id)
+                    )
+
+            if post.pin:
+                await bot.pin_chat_message(
+                    chat_id=channel.chat_id,
+                    message_id=message.message_id,
+                    disable_notification=not post.sound,
+                )
+
+            if not post.comments:
+                # get all user ids from channel
+                result["channel_members"] = await bot.get_chat_member_count(
+                    chat_id=channel.chat_id
+                )
+                # for member in channel_members:
+                await bot.restrict_chat_member(
+                    chat_id=channel.chat_id,
+                    user_id=payload["user_chat_id"],
+                    permissions={
+                        "can_send_messages": False,
+                        "can_send_media_messages": False,
+                        "can_send_polls": False,
+                        "can_add_web_page_previews": False,
+                        "can_change_info": False,
+                        "can_invite_users": False,
+                        "can_pin_messages": False,
+                    },
+                )
+
+            if post.signature:
+                signature = await bot.send_message(
+                    chat_id=channel.chat_id,
+                    text=f"Post by @{payload['user_username']}",
+                )
+                result["extra_messages"].append((channel.chat_id, signature.message_id))
+
+        except Exception as e:
+            print(f"Error sending post to channel {channel.chat_id}: {e}")
+
+        return result
+
+    async def _start_delivery_run(
+        self, post: Post, run_id: str
+    ) -> tuple[list[Channel], int, dict[str, int]]:
+        """
+        Начинает или продолжает запуск рассылки по outbox (delivery_intents).
+        При повторе запуска каналы, которые уже получили пост (sent) или могли
+        получить его до падения процесса (sending), пропускаются; каналы
+        с ошибкой и каналы, до которых рассылка не дошла, отправляются.
+        :param post: Пост с загруженными каналами.
+        :param run_id: ID запуска рассылки.
+        :return: Каналы для отправки, количество пропущенных каналов
+            и число прошлых попыток по chat_id каналов с ошибкой.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        # Строки прерванных запусков, которые так и не повторили
+        await self.session.execute(
+            delete(DeliveryIntent).where(
+                DeliveryIntent.post_id == post.id,
+                DeliveryIntent.created_at
+                < now - datetime.timedelta(seconds=DELIVERY_INTENT_TTL),
+            )
+        )
+        intents = (
+            (
+                await self.session.execute(
+                    select(DeliveryIntent).where(
+                        DeliveryIntent.post_id == post.id,
+                        DeliveryIntent.run_id == run_id,
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+        skip_chat_ids = {
+            intent.chat_id for intent in intents if intent.status != "failed"
+        }
+        failed_attempts = {
+            intent.chat_id: intent.attempts
+            for intent in intents
+            if intent.status == "failed"
+        }
+        in_flight = [intent for intent in intents if intent.status == "sending"]
+        if intents:
+            print(
+                f"Resuming delivery {run_id} of post {post.id}: skipping "
+                f"{len(skip_chat_ids)} channels, {len(in_flight)} of them may "
+                f"have received it before a restart"
+            )
+        if in_flight:
+            await self.session.execute(
+                update(DeliveryIntent)
+                .where(
+                    DeliveryIntent.post_id == post.id,
+                    DeliveryIntent.run_id == run_id,
+                    DeliveryIntent.status == "sending",
+                )
+                .values(status="unknown")
+            )
+        if failed_attempts:
+            await self.session.execute(
+                delete(DeliveryIntent).where(
+                    DeliveryIntent.post_id == post.id,
+                    DeliveryIntent.run_id == run_id,
+                    DeliveryIntent.status == "failed",
+                )
+            )
+        await self.session.commit()
+
+        channels = [
+            channel for channel in post.channels if channel.chat_id not in skip_chat_ids
+        ]
+        return channels, len(post.channels) - len(channels), failed_attempts
+
     async def send_post(
         self,
         post_id: int,
         send_report_to_owner: bool = False,
         callback: Callable = None,
+        run_id: str | None = None,
     ) -> dict[str, Any]:
         """
-        Отправляет пост в указанный канал.
+        Отправляет пост во все каналы поста.
+        Каналы обрабатываются параллельно, не более DELIVERY_CONCURRENCY одновременно.
         :param post: Пост, который нужно отправить.
+        :param callback: Вызывается для каждого доставленного сообщения
+            (post, chat_id, message_id, remove_datetime); возвращённая
+            запись сохраняется вместе с записью о доставке.
+        :param run_id: ID запуска рассылки; повтор с тем же ID продолжает
+            прерванную рассылку (по умолчанию - новый запуск).
+        :return: Итоги рассылки; error - исключение, прервавшее рассылку.
         """
         post = None
         channels = []
+        skipped_channels = 0
+        error = None
         try:
 
             ikb = InlineKeyboardBuilder()
@@ -70,7 +482,7 @@ class PostRepository(BaseRepository):
 
             print("Post ID:", post_id)
 
-            post = self.get_by_id(int(post_id))
+            post = await self.get_post_for_delivery(int(post_id))
 
             if not post:
                 print(f"Post with ID {post_id} not found")
@@ -80,9 +492,9 @@ class PostRepository(BaseRepository):
             reactions = post.post_reaction_buttons
             buttons = post.post_keyboards
 
-            # it can be 8h, 3d, 1w, 2M parse and create datetime
+            # it can be 8h, 3d, 1w, 2m/2M (months) parse and create datetime
             auto_remove_datetime = post.auto_remove_datetime
-            _now = datetime.datetime.now(tz=zoneinfo.ZoneInfo("Europe/Kyiv"))
+            _now = datetime.datetime.now(tz=post.user.tzinfo)
             if auto_remove_datetime:
                 if auto_remove_datetime[-1] == "h":
                     hours = int(auto_remove_datetime[:-1])
@@ -93,7 +505,8 @@ class PostRepository(BaseRepository):
                 elif auto_remove_datetime[-1] == "w":
                     weeks = int(auto_remove_datetime[:-1])
                     remove_datetime = _now + datetime.timedelta(weeks=weeks)
-                elif auto_remove_datetime[-1] == "M":
+                elif auto_remove_datetime[-1] in ("m", "M"):
+                    # Клавиатура удаления отправляет 1m/2m/3m - это месяцы
                     months = int(auto_remove_datetime[:-1])
                     remove_datetime = _now + datetime.timedelta(days=months * 30)
                 else:
@@ -103,23 +516,6 @@ class PostRepository(BaseRepository):
                 # default 48h
                 remove_datetime = _now + datetime.timedelta(hours=48)
 
-            media_file_type = (
-                post.post_media_file.media_file_type if post.post_media_file else None
-            )
-            media_file_path = (
-                post.post_media_file.media_file_path if post.post_media_file else None
-            )
-            media_file_name = (
-                post.post_media_file.media_file_name if post.post_media_file else None
-            )
-            media_file_position = (
-                post.post_media_file.media_file_position
-                if post.post_media_file
-                else None
-            )
-
-            text = post.text
-
             channel_members = 0
 
             if reactions:
@@ -157,174 +553,227 @@ class PostRepository(BaseRepository):
                 print(f"No channels found for post ID {post_id}")
                 return
 
-            sended_channels = 0
-            for channel in post.channels:
-                message = None
-                try:
-                    if media_file_type == "photo":
-                        photo = FSInputFile(
-                            path=media_file_path, filename=media_file_name
-                        )
-                        message = await bot.send_photo(
-                            chat_id=channel.chat_id,
-                            photo=photo,
-                            caption=text,
-                            disable_notification=not post.sound,
-                            # protect_content=not post.comments,
-                            reply_markup=ikb.as_markup(),
-                            show_caption_above_media=(
-                                True
-                                if media_file_position == "bottom_preview"
-                                else False
-                            ),
-                        )
-                        if callback is not None and remove_datetime:
-                            callback(
-                                post,
-                                channel.chat_id,
-                                message.message_id,
-                                remove_datetime,
-                            )
-
-                        if post.recipient_post_chat_id:
-                            await bot.send_photo(
-                                chat_id=post.recipient_post_chat_id,
-                                photo=photo,
-                                caption=text,
-                                disable_notification=not post.sound,
-                                reply_markup=ikb.as_markup(),
-                            )
+            # Всё, что нужно для отправки, собираем до параллельной рассылки,
+            # чтобы задачи не обращались к сессии одновременно
+            media_file = post.post_media_file
+            payload = {
+                "text": post.text,
+                "reply_markup": ikb.as_markup(),
+                "media_file_type": media_file.media_file_type if media_file else None,
+                "media_file_path": media_file.media_file_path if media_file else None,
+                "media_file_name": media_file.media_file_name if media_file else None,
+                "media_file_position": (
+                    media_file.media_file_position if media_file else None
+                ),
+                "media_file_id": media_file.media_file_id if media_file else None,
+                "user_chat_id": post.user.chat_id,
+                "user_username": post.user.username,
+            }
 
-                    elif media_file_type == "video":
-                        video = FSInputFile(
-                            path=media_file_path, filename=media_file_name
-                        )
-                        message = await bot.send_video(
-                            chat_id=channel.chat_id,
-                            video=video,
-                            caption=text,
-                            disable_notification=not post.sound,
-                            reply_markup=ikb.as_markup(),
-                            # protect_content=not post.comments,
-                            show_caption_above_media=(
-                                True
-                                if media_file_position == "bottom_preview"
-                                else False
-                            ),
-                        )
-                        if callback is not None:
-                            callback(
-                                post,
-                                channel.chat_id,
-                                message.message_id,
-                                remove_datetime,
+            run_id = run_id or uuid.uuid4().hex
+            pending_channels, skipped_channels, failed_attempts = (
+                await self._start_delivery_run(post, run_id)
+            )
+            intents_t = DeliveryIntent.__table__
+
+            semaphore = asyncio.Semaphore(DELIVERY_CONCURRENCY)
+            flush_lock = asyncio.Lock()
+            # Записи о доставленных сообщениях (и очередь автоудаления),
+            # ещё не сохранённые в базе
+            pending_messages: list = []
+            # Итоги каналов для outbox (параметры UPDATE) по chat_id
+            pending_statuses: dict[str, dict[str, Any]] = {}
+            # Каналы, в которые сейчас начнётся отправка, и уже записанные
+            pending_sends: set[str] = set()
+            recorded_sends: set[str] = set()
+
+            async def flush_messages() -> None:
+                """
+                Одним коммитом записывает каналы, в которые начинается отправка,
+                накопленные post_messages и итоги каналов в outbox.
+                """
+                async with flush_lock:
+                    if not pending_statuses and not pending_sends:
+                        return
+                    batch = pending_messages.copy()
+                    statuses = pending_statuses.copy()
+                    sends = pending_sends.copy()
+                    pending_messages.clear()
+                    pending_statuses.clear()
+                    pending_sends.clear()
+                    try:
+                        self.session.add_all(batch)
+                        if sends:
+                            now = datetime.datetime.now(datetime.timezone.utc)
+                            await self.session.execute(
+                                intents_t.insert(),
+                                [
+                                    {
+                                        "post_id": post.id,
+                                        "run_id": run_id,
+                                        "chat_id": chat_id,
+                                        "status": "sending",
+                                        "attempts": failed_attempts.get(chat_id, 0) + 1,
+                                        "created_at": now.replace(tzinfo=None),
+                                    }
+                                    for chat_id in sends
+                                ],
                             )
-                        if post.recipient_post_chat_id:
-                            await bot.send_video(
-                                chat_id=post.recipient_post_chat_id,
-                                video=video,
-                                caption=text,
-                                disable_notification=not post.sound,
-                                reply_markup=ikb.as_markup(),
+                        if statuses:
+                            await self.session.execute(
+                                intents_t.update()
+                                .where(
+                                    intents_t.c.post_id == post.id,
+                                    intents_t.c.run_id == run_id,
+                                    intents_t.c.chat_id == bindparam("b_chat_id"),
+                                )
+                                .values(
+                                    status=bindparam("b_status"),
+                                    message_id=bindparam("b_message_id"),
+                                ),
+                                list(statuses.values()),
                             )
-
-                    else:
-                        message = await bot.send_message(
-                            chat_id=channel.chat_id,
-                            text=text,
-                            reply_markup=ikb.as_markup(),
+                        await self.session.commit()
+                        recorded_sends.update(sends)
+                    except Exception as e:
+                        await self.session.rollback()
+                        print(f"Error saving {len(batch)} post messages: {e}")
+
+            async def start_send(channel: Channel) -> bool:
+                """
+                Записывает канал в outbox до отправки. Каналы, начинающие
+                отправку одновременно, записываются одним коммитом.
+                :return: False - запись не удалась, отправлять нельзя.
+                """
+                pending_sends.add(channel.chat_id)
+                await flush_messages()
+                return channel.chat_id in recorded_sends
+
+            async def send(channel: Channel) -> dict[str, Any]:
+                if not await start_send(channel):
+                    return {
+                        "channel": channel,
+                        "message": None,
+                        "channel_members": None,
+                        "media_file_id": None,
+                        "extra_messages": [],
+                        "unrecorded": True,
+                    }
+                return await self._send_to_channel(post, channel, payload)
+
+            async def save_result(result: dict[str, Any]) -> None:
+                # Пишем пачками по мере доставки: при падении процесса
+                # теряется не больше DELIVERY_COMMIT_BATCH_SIZE записей,
+                # а их каналы остаются sending в outbox
+                if result.get("unrecorded"):
+                    return
+                chat_id = result["channel"].chat_id
+                pending_statuses[chat_id] = {
+                    "b_chat_id": chat_id,
+                    "b_status": "sent" if result["message"] else "failed",
+                    "b_message_id": (
+                        result["message"].message_id if result["message"] else None
+                    ),
+                }
+                # Сообщение в канале, копия получателю и подпись: каждое
+                # пишется в post_messages и ставится в очередь автоудаления
+                messages = (
+                    [(chat_id, result["message"].message_id)]
+                    if result["message"]
+                    else []
+                ) + result["extra_messages"]
+                for message_chat_id, message_id in messages:
+                    message_chat_id = str(message_chat_id)
+                    pending_messages.append(
+                        PostMessage(
+                            post_id=post.id,
+                            chat_id=message_chat_id,
+                            message_id=message_id,
                         )
-                        if callback is not None:
-                            callback(
-                                post,
-                                channel.chat_id,
-                                message.message_id,
-                                remove_datetime,
-                            )
-                        if post.recipient_post_chat_id:
-                            await bot.send_message(
-                                chat_id=post.recipient_post_chat_id,
-                                text=text,
-                                reply_markup=ikb.as_markup(),
+                    )
+                    try:
+                        if callback is not None and remove_datetime:
+                            record = callback(
+                                post, message_chat_id, message_id, remove_datetime
                             )
-
-                    if post.pin:
-                        await bot.pin_chat_message(
-                            chat_id=channel.chat_id,
-                            message_id=message.message_id,
-                            disable_notification=not post.sound,
+                            if record is not None:
+                                pending_messages.append(record)
+                    except Exception as e:
+                        print(
+                            f"Error scheduling removal for chat {message_chat_id}: {e}"
                         )
+                if len(pending_statuses) >= DELIVERY_COMMIT_BATCH_SIZE:
+                    await flush_messages()
+
+            async def deliver(channel: Channel) -> dict[str, Any]:
+                async with semaphore:
+                    result = await send(channel)
+                await save_result(result)
+                return result
+
+            results = []
+
+            # Файл загружается в Telegram только один раз: отправляем в каналы
+            # по очереди, пока не получим file_id, остальным - уже по file_id
+            while pending_channels and media_file and not payload["media_file_id"]:
+                result = await send(pending_channels.pop(0))
+                results.append(result)
+                if result["media_file_id"]:
+                    payload["media_file_id"] = result["media_file_id"]
+                    media_file.media_file_id = result["media_file_id"]
+                    self.session.add(media_file)
+                await save_result(result)
 
-                    if message:
-                        sended_channels += 1
-                        channels.append(channel)
-                        post.messages_ids.append(
-                            {
-                                "chat_id": channel.chat_id,
-                                "message_id": message.message_id,
-                            }
-                        )
-                        if not channel.messages_ids:
-                            channel.messages_ids = []
-                        channel.messages_ids.append(
-                            {
-                                "chat_id": channel.chat_id,
-                                "post_id": post.id,
-                                "message_id": message.message_id,
-                            }
-                        )
-                        self.session.add(channel)
-                        self.session.add(post)
-                        self.session.commit()
-
-                    if not post.comments:
-                        # get all user ids from channel
-                        channel_members = await bot.get_chat_member_count(
-                            chat_id=channel.chat_id
-                        )
-                        # for member in channel_members:
-                        await bot.restrict_chat_member(
-                            chat_id=channel.chat_id,
-                            user_id=post.user.chat_id,
-                            permissions={
-                                "can_send_messages": False,
-                                "can_send_media_messages": False,
-                                "can_send_polls": False,
-                                "can_add_web_page_previews": False,
-                                "can_change_info": False,
-                                "can_invite_users": False,
-                                "can_pin_messages": False,
-                            },
-                        )
+            results += await asyncio.gather(
+                *[deliver(channel) for channel in pending_channels]
+            )
+            await flush_messages()
+            # Запуск завершён, продолжать его не нужно
+            await self.session.execute(
+                delete(DeliveryIntent).where(
+                    DeliveryIntent.post_id == post.id, DeliveryIntent.run_id == run_id
+                )
+            )
+            await self.session.commit()
 
-                    if post.signature:
-                        message = await bot.send_message(
-                            chat_id=channel.chat_id,
-                            text=f"Post by @{post.user.username}",
-                        )
+            sended_channels = 0
+            for result in results:
+                channel = result["channel"]
+                message = result["message"]
 
-                except Exception as e:
-                    self.session.rollback()
-                    print(f"Error sending post to channel {channel.chat_id}: {e}")
+                if result["channel_members"] is not None:
+                    channel_members = result["channel_members"]
+
+                if not message:
                     continue
 
+                sended_channels += 1
+                channels.append(channel)
+
         except Exception as e:
             print(f"Error sending post: {e}")
+            error = e
 
         finally:
+            # error - рассылка прервалась, вызывающий код решает, повторять ли её
             if not post:
                 print(f"Post with ID {post_id} not found")
-                return {}
+                return {"error": error}
             if not len(channels):
                 print(f"No channels found for post ID {post_id}")
-                return {}
+                return {
+                    "error": error,
+                    "sended_channels": 0,
+                    "skipped_channels": skipped_channels,
+                    "total_channels": len(post.channels),
+                }
             _channels_list = f"{html.blockquote('\n'.join([f"→ {ch.title} - {ch.type}" for ch in channels]))}\n\n"
             _creatator = f"<b>Автор:</b> {html.link(f"@{post.user.username}", f"tg://user?id={post.user.chat_id}")} | {post.user.full_name}\n"
             if post.recipient_report_chat_id:
                 try:
                     await bot.send_message(
                         chat_id=post.recipient_report_chat_id,
-                        text=f"<b>✅ 📬 Отправка завершена</b>\n\n{_channels_list}<b>📨 Доставлено:</b>{len(post.messages_ids)}/{total_channels}\n\n{_creatator}\n\n",
+                        text=f"<b>✅ 📬 Отправка завершена</b>\n\n{_channels_list}<b>📨 Доставлено:</b>{sended_channels}/{total_channels}\n\n{_creatator}\n\n",
                     )
                 except Exception as e:
                     print(f"Error sending report to user: {e}")
@@ -333,11 +782,10 @@ class PostRepository(BaseRepository):
                 try:
                     await bot.send_message(
                         chat_id=post.user.chat_id,
-                        text=f"<b>✅ 📬 Отправка завершена</b>\n\n{_channels_list}<b>📨 Доставлено:</b>{len(post.messages_ids)}/{total_channels}\n\n{_creatator}\n\n",
+                        text=f"<b>✅ 📬 Отправка завершена</b>\n\n{_channels_list}<b>📨 Доставлено:</b>{sended_channels}/{total_channels}\n\n{_creatator}\n\n",
                     )
                 except Exception as e:
                     print(f"Error sending report to user: {e}")
-            self.session.close()
             return {
                 "sended_channels": sended_channels,
                 "total_channels": total_channels,
@@ -345,9 +793,11 @@ class PostRepository(BaseRepository):
                 "channels": channels,
                 "channel_members": channel_members,
                 "user": post.user,
+                "skipped_channels": skipped_channels,
+                "error": error,
             }
 
-    def update_post(
+    async def update_post(
         self, user: User, post_id: int, post_form: dict[str, Any]
     ) -> Post | bool:
         """
@@ -356,7 +806,7 @@ class PostRepository(BaseRepository):
         :param post_form: Данные поста.
         """
         try:
-            post = self.get_by_id(post_id)
+            post = await self.get_by_id(post_id)
             if not post:
                 print(f"Post with ID {post_id} not found")
                 return False
@@ -368,6 +818,7 @@ class PostRepository(BaseRepository):
             post.signature = True if post_form.get("signature") == "on" else False
             post.recipient_report_chat_id = post_form.get("recipient_report_chat_id")
             post.time_frames = post_form.get("time_frames", [])
+            post.time_frame_specs = to_time_frame_specs(post.time_frames)
             post.auto_repeat_dates = post_form.get("auto_repeat_dates", [])
 
             date_frames_confirm = post_form.get("date_frames_confirm", None)
@@ -390,9 +841,7 @@ class PostRepository(BaseRepository):
             chat_channel_list = post_form.get("chat_channel_list")
             if chat_channel_list:
                 for chat_channel in chat_channel_list:
-                    channel = self.session.execute(
-                        select(Channel).where(Channel.id == chat_channel["id"])
-                    ).scalar()
+                    channel = await self.session.get(Channel, chat_channel["id"])
                     if channel:
                         post.channels.append(channel)
 
@@ -411,12 +860,14 @@ class PostRepository(BaseRepository):
                     post.post_media_file.media_file_position = post_form.get(
                         "media_file_position"
                     )
+                    post.post_media_file.media_file_id = post_form.get("media_file_id")
                 else:
                     media_file = MediaFile(
                         media_file_path=post_form.get("media_file_path"),
                         media_file_name=post_form.get("media_file_name"),
                         media_file_type=post_form.get("media_file_type"),
                         media_file_position=post_form.get("media_file_position"),
+                        media_file_id=post_form.get("media_file_id"),
                         post=post,
                     )
                     self.session.add(media_file)
@@ -424,7 +875,7 @@ class PostRepository(BaseRepository):
             else:
                 # If media file is not provided, remove existing media file
                 if post.post_media_file:
-                    self.session.delete(post.post_media_file)
+                    await self.session.delete(post.post_media_file)
                     post.post_media_file = None
 
             if reactions:
@@ -449,17 +900,15 @@ class PostRepository(BaseRepository):
                     post.post_keyboards.append(post_keyboard)
 
             self.session.add(post)
-            self.session.flush()  # Ensure post is bound and has an ID before using it for relationships
-            self.session.commit()
+            await self.session.flush()  # Ensure post is bound and has an ID before using it for relationships
+            await self.session.commit()
             return post
         except Exception as e:
             print(f"Error updating post: {e}")
-            self.session.rollback()
+            await self.session.rollback()
             return False
-        finally:
-            self.session.close()
 
-    def create_post(self, user: User, post_form: dict[str, Any]) -> Post | None:
+    async def create_post(self, user: User, post_form: dict[str, Any]) -> Post | None:
         """
         Создает новый пост и связывает его с пользователем.
         :param user: Пользователь, которому принадлежит пост.
@@ -482,7 +931,12 @@ class PostRepository(BaseRepository):
                 recipient_post_chat_id=post_form.get("recipient_post_chat_id"),
                 auto_remove_datetime=post_form.get("auto_remove_datetime"),
                 time_frames=post_form.get("time_frames", []),
+                time_frame_specs=to_time_frame_specs(post_form.get("time_frames")),
                 auto_repeat_dates=post_form.get("auto_repeat_dates", []),
+                # Пустые коллекции, чтобы после autoflush они не загружались лениво
+                channels=[],
+                post_keyboards=[],
+                post_reaction_buttons=[],
             )
 
             self.session.add(post)
@@ -522,9 +976,7 @@ class PostRepository(BaseRepository):
             if chat_channel_list:
                 for chat_channel in chat_channel_list:
                     if chat_channel["checked"] == "on":
-                        channel = self.session.execute(
-                            select(Channel).where(Channel.id == chat_channel["id"])
-                        ).scalar()
+                        channel = await self.session.get(Channel, chat_channel["id"])
                         if channel:
                             post.channels.append(channel)
 
@@ -535,53 +987,21 @@ class PostRepository(BaseRepository):
                     media_file_name=post_form.get("media_file_name"),
                     media_file_type=post_form.get("media_file_type"),
                     media_file_position=post_form.get("media_file_position"),
+                    media_file_id=post_form.get("media_file_id"),
                     post=post,
                 )
                 self.session.add(post_media_file)
                 post.post_media_file = post_media_file
 
-            self.session.commit()
-            self.session.refresh(post)
-            post = self.get_by_id(post.id)  # Refresh the post object
+            await self.session.commit()
+            post = await self.get_by_id(post.id)  # Refresh the post object
             print(f"Post created with ID: {post.id}")
             return post
         except Exception as e:
             print(f"Error creating post: {e}")
-            self.session.rollback()
-            self.session.close()
+            await self.session.rollback()
             return False
 
-    def get_post_by_forward_message(
-        self, user_id: int, forward_from_chat_id: str, forward_from_message_id: int
-    ) -> Post | None:
-        # fund channel by forward_from_chat_id and user_id
-        channel = self.session.execute(
-            select(Channel).where(
-                Channel.chat_id == forward_from_chat_id,
-                Channel.user_id == user_id,
-            )
-        ).scalar()
-
-        if not channel:
-            print(f"Channel with chat_id {forward_from_chat_id} not found")
-            return None
-
-        if not channel.messages_ids:
-            print(f"Channel with chat_id {forward_from_chat_id} has no messages_ids")
-            return None
-        # find post by forward_from_message_id and channel
-        for message_id in channel.messages_ids:
-            if (
-                message_id["chat_id"] == forward_from_chat_id
-                and message_id["message_id"] == forward_from_message_id
-            ):
-                post = self.session.execute(
-                    select(Post).where(Post.id == message_id["post_id"])
-                ).scalar()
-                return post
-
-        return None
-
     # def update_post(self, post_id: int, post_form: dict[str, Any]) -> Post | bool:
     #     """
     #     Обновляет пост по его ID.
@@ -631,139 +1051,181 @@ class PostRepository(BaseRepository):
     #     finally:
     #         self.session.close()
 
-    def update_post_reaction_by_user_id(
-        self, post_id: int, reaction_id: int, user_id: int
-    ) -> bool:
+    async def get_user_reaction_id(self, post_id: int, user_id: int) -> int | None:
         """
-        Обновляет реакцию пользователя на пост.
+        Возвращает ID реакции, за которую пользователь проголосовал в посте.
         :param post_id: ID поста.
-        :param reaction_id: ID реакции.
         :param user_id: ID пользователя.
+        :return: ID реакции или None, если пользователь не голосовал.
         """
-        try:
-            post = self.get_by_id(post_id)
-            if not post:
-                print(f"Post with ID {post_id} not found")
-                return False
-            all_reactions = (
-                self.session.execute(
-                    select(PostReactioButton).where(
-                        PostReactioButton.post_id == post.id,
+        result = await self.session.execute(
+            select(ReactionVote.reaction_id).where(
+                ReactionVote.post_id == post_id,
+                ReactionVote.user_id == user_id,
+            )
+        )
+        return result.scalar()
+
+    async def _write_reaction_votes(self, votes: dict[tuple[int, int], int]) -> None:
+        """
+        Записывает голоса и пересчитывает счётчики реакций их постов
+        по reaction_votes (без коммита).
+        :param votes: Реакция пользователя по ключу (ID поста, ID пользователя).
+        """
+        existing_votes = (
+            (
+                await self.session.execute(
+                    select(ReactionVote).where(
+                        tuple_(ReactionVote.post_id, ReactionVote.user_id).in_(
+                            list(votes)
+                        )
                     )
                 )
-                .scalars()
-                .all()
             )
-            reaction = self.session.execute(
-                select(PostReactioButton).where(
-                    PostReactioButton.id == reaction_id,
-                    PostReactioButton.post_id == post.id,
+            .scalars()
+            .all()
+        )
+        existing_votes = {(vote.post_id, vote.user_id): vote for vote in existing_votes}
+        for (post_id, user_id), reaction_id in votes.items():
+            vote = existing_votes.get((post_id, user_id))
+            if vote:
+                vote.reaction_id = reaction_id
+            else:
+                self.session.add(
+                    ReactionVote(
+                        post_id=post_id,
+                        user_id=user_id,
+                        reaction_id=reaction_id,
+                    )
                 )
-            ).scalar()
 
-            if not reaction:
-                print(f"Reaction with ID {reaction_id} not found")
-                return False
+        # Счётчик - число голосов в базе, поэтому голоса других процессов
+        # и повторная запись тех же голосов его не искажают
+        await self.session.execute(
+            update(PostReactioButton)
+            .where(PostReactioButton.post_id.in_({post_id for post_id, _ in votes}))
+            .values(
+                reactions_count=select(func.count(ReactionVote.id))
+                .where(ReactionVote.reaction_id == PostReactioButton.id)
+                .scalar_subquery()
+            )
+        )
 
-            if user_id not in reaction.reactions:
-                for r in all_reactions:
-                    if user_id in r.reactions:
-                        r.reactions.remove(user_id)
-                reaction.reactions.append(user_id)
-            # self.session.add(reaction)
-            self.session.commit()
+    async def save_reaction_votes(self, votes: dict[tuple[int, int], int]) -> bool:
+        """
+        Сохраняет накопленные голоса одной транзакцией и пересчитывает
+        счётчики реакций. Если пачка нарушает ограничение (пост удалён,
+        голос уже записал другой процесс), голоса пишутся по одному
+        и отбрасываются только те, что записать нельзя.
+        :param votes: Реакция пользователя по ключу (ID поста, ID пользователя).
+        :return: False - голоса не записаны (ошибка базы), пачку стоит повторить.
+        """
+        if not votes:
             return True
+        try:
+            await self._write_reaction_votes(votes)
+            await self.session.commit()
+            return True
+        except IntegrityError as e:
+            await self.session.rollback()
+            print(f"Saving {len(votes)} reaction votes one by one: {e}")
         except Exception as e:
-            self.session.rollback()
-            print(f"Error updating post reaction: {e}")
-            self.session.close()
+            await self.session.rollback()
+            print(f"Error saving reaction votes: {e}")
             return False
-        finally:
-            self.session.close()
 
-    def delete_post(self, post_id: int) -> bool:
+        for key, reaction_id in votes.items():
+            try:
+                await self._write_reaction_votes({key: reaction_id})
+                await self.session.commit()
+            except IntegrityError as e:
+                await self.session.rollback()
+                print(f"Dropping reaction vote {key}: {e}")
+            except Exception as e:
+                await self.session.rollback()
+                print(f"Error saving reaction votes: {e}")
+                return False
+        return True
+
+    async def delete_post(self, post_id: int) -> bool:
         """
         Удаляет пост по его ID.
         :param post_id: ID поста.
         """
         try:
-            post = self.get_by_id(post_id)
+            post = await self.get_by_id(post_id)
             if not post:
                 print(f"Post with ID {post_id} not found")
                 return False
 
-            self.session.delete(post)
-            self.session.commit()
+            await self.session.delete(post)
+            await self.session.commit()
             return True
         except Exception as e:
+            await self.session.rollback()
             print(f"Error deleting post: {e}")
             return False
-        finally:
-            self.session.close()
 
-    def archive_post(self, post_id: int) -> bool:
+    async def archive_post(self, post_id: int) -> bool:
         """
         Архивирует пост по его ID.
         :param post_id: ID поста.
         """
         try:
-            post = self.get_by_id(post_id)
+            post = await self.get_by_id(post_id)
             if not post:
                 print(f"Post with ID {post_id} not found")
                 return False
 
             post.is_archived = True
-            self.session.commit()
+            await self.session.commit()
             return True
         except Exception as e:
-            self.session.rollback()
+            await self.session.rollback()
             print(f"Error archiving post: {e}")
             return False
-        finally:
-            self.session.close()
 
-    def unarchive_post(self, post_id: int) -> bool:
+    async def unarchive_post(self, post_id: int) -> bool:
         """
         Разархивирует пост по его ID.
         :param post_id: ID поста.
         """
         try:
-            post = self.get_by_id(post_id)
+            post = await self.get_by_id(post_id)
             if not post:
                 print(f"Post with ID {post_id} not found")
                 return False
 
             post.is_archived = False
-            self.session.commit()
+            await self.session.commit()
             return True
         except Exception as e:
-            self.session.rollback()
+            await self.session.rollback()
             print(f"Error unarchiving post: {e}")
             return False
-        finally:
-            self.session.close()
 
-    def get_all_posts_by_user_id(self, user_id: int) -> list[Post]:
+    async def get_all_posts_by_user_id(self, user_id: int) -> list[Post]:
         """
         Возвращает все посты пользователя по его ID.
         :param user_id: ID пользователя.
         :return: Список постов пользователя.
         """
-        return (
-            self.session.query(Post)
-            .filter(Post.user_id == user_id)
-            .order_by(Post.created_at.desc())
-            .all()
+        result = await self.session.execute(
+            select(Post).where(Post.user_id == user_id).order_by(Post.created_at.desc())
         )
+        return result.scalars().all()
 
-    def get_all_posts(self) -> list[Post]:
+    async def get_all_posts(self) -> list[Post]:
         """
         Возвращает все посты.
         :return: Список всех постов.
         """
-        return self.session.query(Post).order_by(Post.created_at.desc()).all()
+        result = await self.session.execute(
+            select(Post).order_by(Post.created_at.desc())
+        )
+        return result.scalars().all()
 
-    def get_post_by_chat_id_and_message_id(
+    async def get_post_by_chat_id_and_message_id(
         self, chat_id: str, message_id: int
     ) -> Post | None:
         """
@@ -772,15 +1234,150 @@ class PostRepository(BaseRepository):
         :param message_id: ID сообщения.
         :return: Пост или None, если пост не найден.
         """
-        # For ARRAY of JSON, .any_ expects a single dict; for ARRAY of scalar, a value; for JSONB, use .contains or .has
-        # If messages_ids is a JSON/ARRAY of dicts, use .any_({'chat_id': chat_id, 'message_id': message_id})
-        # If this fails, fallback to manual filter
-        return (
-            self.session.query(Post)
+        result = await self.session.execute(
+            select(PostMessage.post_id)
             .where(
-                cast(Post.messages_ids, String).contains(
-                    f'{{"chat_id": "{chat_id}", "message_id": {message_id}}}'
-                )
+                PostMessage.chat_id == str(chat_id),
+                PostMessage.message_id == message_id,
             )
-            .first()
+            .limit(1)
         )
+        post_id = result.scalar()
+        return await self.get_by_id(post_id) if post_id else None
+
+    async def migrate_legacy_reactions(self, batch_size: int = 500) -> int:
+        """
+        Переносит голоса из устаревшего JSON поля reactions кнопок
+        в reaction_votes и reactions_count, очищая поле. Голос пользователя,
+        который уже есть в reaction_votes для этого поста, не переносится.
+        :param batch_size: Сколько кнопок обрабатывается за один коммит.
+        :return: Количество перенесённых голосов.
+        """
+        migrated, last_id = 0, 0
+        try:
+            while True:
+                buttons = (
+                    await self.session.execute(
+                        select(
+                            PostReactioButton.id,
+                            PostReactioButton.post_id,
+                            PostReactioButton.reactions,
+                        )
+                        .where(
+                            PostReactioButton.id > last_id,
+                            cast(PostReactioButton.reactions, String) != "[]",
+                        )
+                        .order_by(PostReactioButton.id)
+                        .limit(batch_size)
+                    )
+                ).all()
+                if not buttons:
+                    return migrated
+                last_id = buttons[-1].id
+
+                voted = set(
+                    (
+                        await self.session.execute(
+                            select(ReactionVote.post_id, ReactionVote.user_id).where(
+                                ReactionVote.post_id.in_(
+                                    {button.post_id for button in buttons}
+                                )
+                            )
+                        )
+                    ).all()
+                )
+                for button_id, post_id, user_ids in buttons:
+                    votes = []
+                    for user_id in user_ids or []:
+                        if (post_id, user_id) in voted:
+                            continue
+                        voted.add((post_id, user_id))
+                        votes.append(
+                            ReactionVote(
+                                post_id=post_id, user_id=user_id, reaction_id=button_id
+                            )
+                        )
+                    self.session.add_all(votes)
+                    await self.session.execute(
+                        update(PostReactioButton)
+                        .where(PostReactioButton.id == button_id)
+                        .values(
+                            reactions=[],
+                            reactions_count=PostReactioButton.reactions_count
+                            + len(votes),
+                        )
+                    )
+                    migrated += len(votes)
+                await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            print(f"Error migrating legacy reactions: {e}")
+            return migrated
+
+    async def migrate_legacy_messages(self) -> int:
+        """
+        Переносит историю сообщений из устаревших JSON полей messages_ids
+        (Post и Channel) в post_messages и очищает эти поля.
+        :return: Количество перенесённых сообщений.
+        """
+        try:
+            legacy_posts = (
+                await self.session.execute(
+                    select(Post.id, Post.messages_ids).where(
+                        Post.messages_ids.is_not(None),
+                        cast(Post.messages_ids, String) != "[]",
+                    )
+                )
+            ).all()
+            migrated = 0
+            for post_id, messages_ids in legacy_posts:
+                self.session.add_all(
+                    [
+                        PostMessage(
+                            post_id=post_id,
+                            chat_id=str(message["chat_id"]),
+                            message_id=message["message_id"],
+                        )
+                        for message in messages_ids or []
+                    ]
+                )
+                migrated += len(messages_ids or [])
+            if legacy_posts:
+                await self.session.execute(
+                    update(Post)
+                    .where(Post.id.in_([post_id for post_id, _ in legacy_posts]))
+                    .values(messages_ids=[])
+                )
+            # В Channel.messages_ids лежат те же сообщения, что и в Post
+            await self.session.execute(
+                update(Channel)
+                .where(cast(Channel.messages_ids, String) != "[]")
+                .values(messages_ids=[])
+            )
+            await self.session.commit()
+            return migrated
+        except Exception as e:
+            await self.session.rollback()
+            print(f"Error migrating legacy post messages: {e}")
+            return 0
+
+    async def compact_post_messages(self) -> int:
+        """
+        Удаляет записи post_messages старше POST_MESSAGES_RETENTION_DAYS
+        и переносит оставшуюся историю из устаревших JSON полей.
+        :return: Количество удалённых записей.
+        """
+        await self.migrate_legacy_messages()
+        try:
+            expired_before = datetime.datetime.now() - datetime.timedelta(
+                days=POST_MESSAGES_RETENTION_DAYS
+            )
+            result = await self.session.execute(
+                delete(PostMessage).where(PostMessage.sent_at < expired_before)
+            )
+            await self.session.commit()
+            return result.rowcount
+        except Exception as e:
+            await self.session.rollback()
+            print(f"Error compacting post messages: {e}")
+            return 0
@@ -1,4 +1,6 @@
-from models import PostSchedule
+from sqlalchemy import select
+
+from models import Post, PostSchedule
 from utils.scheduler import scheduler
 
 from .base import BaseRepository
@@ -9,10 +11,14 @@ class ScheduleRepository(BaseRepository):
         super().__init__(session)
         self.model = PostSchedule
 
-    def find_by_post_id(self, post_id: int) -> PostSchedule:
-        return self.session.query(self.model).filter_by(post_id=post_id).first()
+    async def find_by_post_id(self, post_id: int) -> PostSchedule:
+        return (
+            await self.session.execute(
+                select(self.model).filter_by(post_id=post_id).limit(1)
+            )
+        ).scalar()
 
-    def create_schedule(
+    async def create_schedule(
         self, post_id: int, schedule_time_frames: str, schedule_date_frames: str
     ) -> PostSchedule | None:
         try:
@@ -22,37 +28,46 @@ class ScheduleRepository(BaseRepository):
                 schedule_date_frames=schedule_date_frames.join("|"),
             )
             self.session.add(schedule)
-            self.session.commit()
+            await self.session.commit()
         except Exception as e:
             print(f"Error creating schedule: {e}")
-            self.session.rollback()
+            await self.session.rollback()
             return None
         return schedule
 
-    def update_schedule(
+    async def update_schedule(
         self, schedule_id: int, schedule_time_frames: str, schedule_date_frames: str
     ) -> PostSchedule:
-        schedule = self.session.query(self.model).filter_by(id=schedule_id).first()
+        schedule = await self.session.get(self.model, schedule_id)
         if schedule:
             schedule.schedule_time_frames = schedule_time_frames
             schedule.schedule_date_frames = schedule_date_frames
-            self.session.commit()
+            await self.session.commit()
         return schedule
 
-    def delete_schedule(self, schedule_id: int) -> None:
-        schedule = self.session.query(self.model).filter_by(id=schedule_id).first()
+    async def delete_schedule(self, schedule_id: int) -> None:
+        schedule = await self.session.get(self.model, schedule_id)
         if schedule:
-            self.session.delete(schedule)
-            self.session.commit()
+            await self.session.delete(schedule)
+            await self.session.commit()
         return schedule
 
-    def get_schedules_by_post_id(self, post_id: int) -> list[PostSchedule]:
-        return self.session.query(self.model).filter_by(post_id=post_id).all()
+    async def get_schedules_by_post_id(self, post_id: int) -> list[PostSchedule]:
+        return (
+            (await self.session.execute(select(self.model).filter_by(post_id=post_id)))
+            .scalars()
+            .all()
+        )
 
-    def get_schedules_by_user_id(self, user_id: int) -> list[PostSchedule]:
+    async def get_schedules_by_user_id(self, user_id: int) -> list[PostSchedule]:
         return (
-            self.session.query(self.model)
-            .join(PostSchedule.post)
-            .filter(PostSchedule.post.user_id == user_id)
+            (
+                await self.session.execute(
+                    select(self.model)
+                    .join(PostSchedule.post)
+                    .where(Post.user_id == user_id)
+                )
+            )
+            .scalars()
             .all()
         )
@@ -3,7 +3,38 @@ from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware, Router
 from aiogram.types import TelegramObject
 
-from repositories import user_repository
+from models import get_session
+from repositories import (
+    DeliveryRepository,
+    PostRepository,
+    ScheduleRepository,
+    UserRepository,
+)
+
+
+class DatabaseMiddleware(BaseMiddleware):
+    """
+    Открывает сессию БД на время обработки одного апдейта
+    и передаёт в хендлеры репозитории, работающие в этой сессии.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        async with get_session() as session:
+            data["session"] = session
+            data["user_repository"] = UserRepository(session)
+            data["post_repository"] = PostRepository(session)
+            data["scheduler_repository"] = ScheduleRepository(session)
+            data["delivery_repository"] = DeliveryRepository(session)
+            try:
+                return await handler(event, data)
+            except Exception:
+                await session.rollback()
+                raise
 
 
 class UserMiddleware(BaseMiddleware):
@@ -17,10 +48,11 @@ class UserMiddleware(BaseMiddleware):
         data: Dict[str, Any],
     ) -> Any:
         event_user = data.get("event_from_user", None)
+        user_repository: UserRepository = data["user_repository"]
         user = None
         if event_user:
             try:
-                user = user_repository.find_by_chat_id(event_user.id)
+                user = await user_repository.find_by_chat_id(event_user.id)
             except Exception as e:
                 print(f"Error finding user by chat_id: {e}")
         if user:
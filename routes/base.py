@@ -6,7 +6,8 @@ from aiogram.utils.formatting import BlockQuote, Underline, as_list, as_marked_s
 
 from bot import OWNER_ID, bot
 from keyboard.keyboard import get_main_keyboard
-from repositories import user_repository
+from models.User import DEFAULT_TIMEZONE
+from repositories import UserRepository
 from states.post import PostForm
 from utils.messages import get_notify_update_version_message
 
@@ -24,10 +25,12 @@ async def admin_message_handler(message: Message, state: FSMContext) -> None:
 
 
 @base_router.message(PostForm.admin_message)
-async def send_admin_message_handler(message: Message, state: FSMContext) -> None:
+async def send_admin_message_handler(
+    message: Message, state: FSMContext, user_repository: UserRepository
+) -> None:
     if OWNER_ID == str(message.from_user.id):
         text = message.text
-        users = user_repository.get_all_users()
+        users = await user_repository.get_all_users()
         if not users:
             await message.answer("Пользователей нет")
             return
@@ -55,9 +58,9 @@ async def send_admin_message_handler(message: Message, state: FSMContext) -> Non
 
 
 @base_router.message(Command("users"))
-async def users_handler(message: Message) -> None:
+async def users_handler(message: Message, user_repository: UserRepository) -> None:
     if OWNER_ID == str(message.from_user.id):
-        users = user_repository.get_all_users()
+        users = await user_repository.get_all_users()
         if not users:
             await message.answer("Пользователей нет")
             return
@@ -72,9 +75,9 @@ async def users_handler(message: Message) -> None:
 
 
 @base_router.message(Command("version"))
-async def version_handler(message: Message) -> None:
+async def version_handler(message: Message, user_repository: UserRepository) -> None:
     if OWNER_ID == str(message.from_user.id):
-        users = user_repository.get_all_users()
+        users = await user_repository.get_all_users()
         for user in users:
             message = await bot.send_message(
                 user.chat_id,
@@ -90,7 +93,7 @@ async def version_handler(message: Message) -> None:
 
 @base_router.message(CommandStart())
 @base_router.message(F.text == "Главное меню")
-async def start_handler(message: Message) -> None:
+async def start_handler(message: Message, user_repository: UserRepository) -> None:
     content = BlockQuote(
         as_list(
             as_marked_section("", "Быстрый старт", marker="🚀 "),
@@ -111,12 +114,12 @@ async def start_handler(message: Message) -> None:
         reply_markup=get_main_keyboard(),
     )
 
-    user = user_repository.find_by_chat_id(message.from_user.id)
+    user = await user_repository.find_by_chat_id(message.from_user.id)
 
     if not user:
         # todo: get timezone from url parameter
-        timezone = "UTC"
-        user_repository.create(
+        timezone = DEFAULT_TIMEZONE
+        await user_repository.create(
             message.from_user.id,
             message.from_user.username,
             message.from_user.full_name,
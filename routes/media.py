@@ -3,7 +3,7 @@ import os
 from aiogram import F, html
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, FSInputFile, Message
+from aiogram.types import CallbackQuery, Message
 from aiogram.utils.formatting import BlockQuote, as_list, as_marked_section
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
@@ -16,7 +16,7 @@ from keyboard.keyboard import (
     get_settings_post_keyboard,
 )
 from models import User
-from repositories import user_repository
+from repositories import UserRepository
 from states.post import PostForm
 
 from . import media_router
@@ -42,7 +42,9 @@ async def set_post_media_handler(
 
 
 @media_router.message(F.photo)
-async def set_post_media_photo_handler(message: Message, state: FSMContext) -> None:
+async def set_post_media_photo_handler(
+    message: Message, state: FSMContext, user_repository: UserRepository
+) -> None:
     """
     Обработчик загрузки медиафайла
     """
@@ -69,7 +71,7 @@ async def set_post_media_photo_handler(message: Message, state: FSMContext) -> N
         return
 
     user_id = message.from_user.id
-    user = user_repository.find_by_chat_id(user_id)
+    user = await user_repository.find_by_chat_id(user_id)
 
     user_media_path = f"{media_path}/{user.id}/photos"
 
@@ -92,6 +94,7 @@ async def set_post_media_photo_handler(message: Message, state: FSMContext) -> N
                 "media_file_path": user_media_file_path,
                 "media_file_type": "photo",
                 "media_file_name": file_name,
+                "media_file_id": file_id,
             }
         )
 
@@ -112,10 +115,8 @@ async def set_post_media_photo_handler(message: Message, state: FSMContext) -> N
 
         ikb.attach(InlineKeyboardBuilder.from_markup(get_settings_post_keyboard(data)))
 
-        photo = FSInputFile(
-            path=data.get("media_file_path", user_media_file_path),
-            filename=data.get("media_file_name", file_name),
-        )
+        # Файл уже есть в Telegram, превью отправляем по file_id
+        photo = file_id
 
         if media_file_position == "top_preview":
             await message.answer_photo(
@@ -136,7 +137,9 @@ async def set_post_media_photo_handler(message: Message, state: FSMContext) -> N
 
 
 @media_router.message(F.video)
-async def set_post_media_video_handler(message: Message, state: FSMContext) -> None:
+async def set_post_media_video_handler(
+    message: Message, state: FSMContext, user_repository: UserRepository
+) -> None:
     """
     Обработчик загрузки медиафайла
     """
@@ -149,8 +152,8 @@ async def set_post_media_video_handler(message: Message, state: FSMContext) -> N
     if state_data != PostForm.upload_media:
         return
 
-    file_id = message.video[-1].file_id
-    file_size = message.video[-1].file_size
+    file_id = message.video.file_id
+    file_size = message.video.file_size
 
     if file_size > 5 * 1024 * 1024:
         await message.answer(
@@ -160,7 +163,7 @@ async def set_post_media_video_handler(message: Message, state: FSMContext) -> N
         return
 
     user_id = message.from_user.id
-    user = user_repository.find_by_chat_id(user_id)
+    user = await user_repository.find_by_chat_id(user_id)
 
     user_media_path = f"{media_path}/{user.id}/videos"
 
@@ -183,6 +186,7 @@ async def set_post_media_video_handler(message: Message, state: FSMContext) -> N
                 "media_file_path": user_media_file_path,
                 "media_file_type": "video",
                 "media_file_name": file_name,
+                "media_file_id": file_id,
             }
         )
 
@@ -203,10 +207,7 @@ async def set_post_media_video_handler(message: Message, state: FSMContext) -> N
 
         ikb.attach(InlineKeyboardBuilder.from_markup(get_settings_post_keyboard(data)))
 
-        video = FSInputFile(
-            data.get("media_file_path", user_media_file_path),
-            filename=data.get("media_file_name", file_name),
-        )
+        video = file_id
 
         if media_file_position == "top_preview":
             await message.answer_video(
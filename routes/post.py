@@ -15,7 +15,7 @@ from aiogram_calendar import (
     SimpleCalendarCallback,
 )
 
-from bot import bot, message_ids_list
+from bot import DELETE_MESSAGES_LIMIT, bot, message_ids_list
 from keyboard.keyboard import (
     ChannelData,
     EmojiButtonData,
@@ -27,7 +27,6 @@ from keyboard.keyboard import (
     get_confirm_auto_repeat_keyboard,
     get_confirm_calendar_keyboard,
     get_confirm_post_keyboard,
-    get_created_post_keyboard,
     get_next_calendar_keyboard,
     get_next_post_time_keyboard,
     get_post_buttons_keyboard,
@@ -37,11 +36,16 @@ from keyboard.keyboard import (
     get_remove_post_interval_keyboard,
     get_settings_post_keyboard,
 )
-from repositories import post_repository, user_repository
+from repositories import DeliveryRepository, PostRepository, UserRepository
 from states.post import PostForm
 from utils import format_date
 from utils.media import remove_media_file
-from utils.messages import get_confirm_auto_repeat_message
+from utils.messages import (
+    get_confirm_auto_repeat_message,
+    get_effective_schedule_message,
+)
+from utils.delivery import DELIVERY_QUEUE
+from utils.reactions import reaction_keyboard_debouncer, reaction_tally_cache
 from utils.scheduler import create_jod, create_remove_post_jod, remove_old_jobs
 
 from . import post_router
@@ -50,12 +54,15 @@ from . import post_router
 async def clear_message_ids(message: Message) -> None:
     """
     Удаляет все сообщения из списка message_ids_list
+    (пачками через deleteMessages)
     """
-    await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
-
-    for msg_id in message_ids_list:
+    message_ids = [message.message_id, *message_ids_list]
+    for i in range(0, len(message_ids), DELETE_MESSAGES_LIMIT):
         try:
-            await bot.delete_message(chat_id=message.chat.id, message_id=msg_id)
+            await bot.delete_messages(
+                chat_id=message.chat.id,
+                message_ids=message_ids[i : i + DELETE_MESSAGES_LIMIT],
+            )
         except Exception as e:
             pass
 
@@ -72,6 +79,7 @@ async def answer_with_post(message: Message, state_data: dict[str, Any]) -> None
     media_file_path = state_data.get("media_file_path")
     media_file_name = state_data.get("media_file_name")
     media_file_type = state_data.get("media_file_type")
+    media_file_id = state_data.get("media_file_id")
 
     reactions = state_data.get("reactions")
     buttons = state_data.get("buttons")
@@ -94,7 +102,9 @@ async def answer_with_post(message: Message, state_data: dict[str, Any]) -> None
     )
 
     if media_file_type == "photo":
-        photo = FSInputFile(path=media_file_path, filename=media_file_name)
+        photo = media_file_id or FSInputFile(
+            path=media_file_path, filename=media_file_name
+        )
         if media_file_position == "top_preview":
             await message.answer_photo(
                 photo=photo,
@@ -111,7 +121,9 @@ async def answer_with_post(message: Message, state_data: dict[str, Any]) -> None
             message_ids_list.append(msg2.message_id)
 
     elif media_file_type == "video":
-        video = FSInputFile(path=media_file_path, filename=media_file_name)
+        video = media_file_id or FSInputFile(
+            path=media_file_path, filename=media_file_name
+        )
         if media_file_position == "top_preview":
             await message.answer_video(
                 video=video,
@@ -226,13 +238,15 @@ async def create_post_handler(message: Message, state: FSMContext) -> None:
         "изменить пост",
     ],
 )
-async def create_post_text_handler(message: Message, state: FSMContext) -> None:
+async def create_post_text_handler(
+    message: Message, state: FSMContext, user_repository: UserRepository
+) -> None:
     """
     Обработчик добавленя текста поста
     """
-    user = user_repository.find_by_chat_id(message.from_user.id)
-    channels = user_repository.get_all_user_channels(user)
-    multiposting = user_repository.get_multiposting_by_user_id(user.id)
+    user = await user_repository.find_by_chat_id(message.from_user.id)
+    channels = await user_repository.get_all_user_channels(user)
+    multiposting = await user_repository.get_multiposting_by_user_id(user.id)
     time_frames = None
     time_frames_active = "on"
 
@@ -281,7 +295,7 @@ async def create_post_text_handler(message: Message, state: FSMContext) -> None:
 
 @post_router.message(PostForm.recipient_report_chat_id)
 async def create_post_recipient_report_chat_id_handler(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, user_repository: UserRepository
 ) -> None:
     """
     Обработчик добавления ID чата для отчета
@@ -289,9 +303,9 @@ async def create_post_recipient_report_chat_id_handler(
     state_data = await state.get_data()
 
     if message.text.isdigit():
-        user = user_repository.find_by_chat_id(message.text)
+        user = await user_repository.find_by_chat_id(message.text)
     else:
-        user = user_repository.find_by_username(message.text)
+        user = await user_repository.find_by_username(message.text)
 
     if not user:
         await message.answer(
@@ -314,7 +328,7 @@ async def create_post_recipient_report_chat_id_handler(
 
 @post_router.message(PostForm.recipient_post_chat_id)
 async def create_post_recipient_post_chat_id_handler(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, user_repository: UserRepository
 ) -> None:
     """
     Обработчик добавления ID чата для копии поста
@@ -322,9 +336,9 @@ async def create_post_recipient_post_chat_id_handler(
     state_data = await state.get_data()
 
     if message.text.isdigit():
-        user = user_repository.find_by_chat_id(message.text)
+        user = await user_repository.find_by_chat_id(message.text)
     else:
-        user = user_repository.find_by_username(message.text)
+        user = await user_repository.find_by_username(message.text)
 
     if not user:
         await message.answer(
@@ -508,12 +522,17 @@ async def process_simple_calendar(
 
 @post_router.callback_query(PostButtonData.filter(F.type == "post_settings_action"))
 async def set_post_settings_action_handler(
-    query: CallbackQuery, state: FSMContext, callback_data: PostButtonData
+    query: CallbackQuery,
+    state: FSMContext,
+    callback_data: PostButtonData,
+    user_repository: UserRepository,
+    post_repository: PostRepository,
+    delivery_repository: DeliveryRepository,
 ) -> None:
     """
     Обработчик действий с постами
     """
-    user = user_repository.find_by_chat_id(query.from_user.id)
+    user = await user_repository.find_by_chat_id(query.from_user.id)
     state_data = await state.get_data()
     simplecalendar = SimpleCalendar(locale="ru_RU.UTF-8")
     channel_list = state_data.get("chat_channel_list", [])
@@ -652,32 +671,59 @@ async def set_post_settings_action_handler(
         auto_repeat_dates = state_data.get("auto_repeat_dates", None)
 
         if not state_data.get("post_id"):
-            post = post_repository.create_post(user, state_data)
+            post = await post_repository.create_post(user, state_data)
             if not time_frames or time_frames_active == "off":
-                await post_repository.send_post(post.id, True, create_remove_post_jod)
+                if DELIVERY_QUEUE:
+                    # Рассылку выполнит воркер, апдейты не ждут отправки
+                    await delivery_repository.enqueue([post.id])
+                else:
+                    await post_repository.send_post(
+                        post.id, True, create_remove_post_jod
+                    )
             else:
-                create_jod(post, time_frames, auto_repeat_dates)
+                effective_schedule = create_jod(
+                    post,
+                    time_frames,
+                    auto_repeat_dates,
+                    user.effective_timezone,
+                    user.schedule_spread_minutes,
+                )
                 await query.message.edit_text(
                     "📤 ⏳ Отправка поста...", inline_message_id=query.inline_message_id
                 )
+                if effective_schedule:
+                    await query.message.answer(
+                        get_effective_schedule_message(effective_schedule)
+                    )
         else:
-            post = post_repository.get_by_id(state_data.get("post_id"))
-            post_time_frames = post.time_frames
+            post = await post_repository.get_by_id(state_data.get("post_id"))
+            post_time_frames = post.time_frame_list
             post_auto_repeat_dates = post.auto_repeat_dates
-            updated_post = post_repository.update_post(
+            updated_post = await post_repository.update_post(
                 user, state_data.get("post_id"), state_data
             )
             if updated_post:
-                post = post_repository.get_by_id(state_data.get("post_id"))
+                reaction_tally_cache.invalidate(updated_post.id)
+                post = await post_repository.get_by_id(state_data.get("post_id"))
                 remove_old_jobs(post, post_time_frames, post_auto_repeat_dates)
-                create_jod(post, time_frames, auto_repeat_dates)
+                effective_schedule = create_jod(
+                    post,
+                    time_frames,
+                    auto_repeat_dates,
+                    user.effective_timezone,
+                    user.schedule_spread_minutes,
+                )
+                if effective_schedule:
+                    await query.message.answer(
+                        get_effective_schedule_message(effective_schedule)
+                    )
 
     if callback_data.action == "active_multiposting_timeframe":
-        multiposting = user_repository.get_multiposting_by_user_id(user.id)
+        multiposting = await user_repository.get_multiposting_by_user_id(user.id)
         if multiposting:
             # active_state = "off" if multiposting.active else "on"
             active_state = "on"
-            user_repository.update_multiposting_active_timeframe(
+            await user_repository.update_multiposting_active_timeframe(
                 user,
                 active_state,
             )
@@ -708,6 +754,7 @@ async def set_post_settings_action_handler(
                     "media_file_name": None,
                     "media_file_position": None,
                     "media_file_type": None,
+                    "media_file_id": None,
                 }
             )
             await query.answer(text=f"✅ Медиафайл удален!", show_alert=True)
@@ -952,16 +999,18 @@ async def set_post_settings_handler(
 
 
 @post_router.message(F.chat & F.chat_shared)
-async def handle_request_chat(message: Message) -> None:
+async def handle_request_chat(
+    message: Message, user_repository: UserRepository
+) -> None:
     """
     Обработчик для получения информации о канале/чате
     """
     chat_info = message.chat_shared
-    user = user_repository.find_by_chat_id(message.from_user.id)
+    user = await user_repository.find_by_chat_id(message.from_user.id)
     if user and chat_info:
         if chat_info.request_id == 1 or chat_info.request_id == 2:
             type = "chat"
-            channel = user_repository.get_user_channel_by_chat_id(
+            channel = await user_repository.get_user_channel_by_chat_id(
                 user, str(chat_info.chat_id)
             )
             if channel:
@@ -970,7 +1019,7 @@ async def handle_request_chat(message: Message) -> None:
                 )
                 return
             print(chat_info, chat_info.title)
-            user_repository.add_channel(
+            await user_repository.add_channel(
                 user, str(chat_info.chat_id), chat_info.title, type
             )
             await message.answer(
@@ -1061,30 +1110,44 @@ async def create_post_buttons_handler(message: Message, state: FSMContext) -> No
 
 @post_router.callback_query(EmojiButtonData.filter())
 async def emoji_button_handler(
-    query: CallbackQuery, state: FSMContext, callback_data: EmojiButtonData
+    query: CallbackQuery,
+    state: FSMContext,
+    callback_data: EmojiButtonData,
 ) -> None:
     """
-    Обработчик добавления эмодзи
+    Обработчик добавления эмодзи.
+    Клик подтверждается сразу и засчитывается в кэше счётчиков,
+    клавиатура обновляется с задержкой (несколько кликов - одно
+    редактирование сообщения).
     """
     try:
-        post_repository.update_post_reaction_by_user_id(
+        await query.answer()
+        updated = await reaction_tally_cache.vote(
             callback_data.post_id,
             callback_data.id,
             query.from_user.id,
         )
-        post = post_repository.get_by_id(callback_data.post_id)
-        await query.message.edit_reply_markup(
-            inline_message_id=query.inline_message_id,
-            reply_markup=get_created_post_keyboard(post),
-        )
+        if updated:
+            reaction_keyboard_debouncer.schedule(
+                callback_data.post_id,
+                chat_id=query.message.chat.id if query.message else None,
+                message_id=query.message.message_id if query.message else None,
+                inline_message_id=query.inline_message_id,
+            )
     except Exception as e:
         print(e)
         return
 
 
 @post_router.message(F.forward_from_chat[F.type == "channel"].as_("channel"))
-async def forwarded_from_channel(message: Message, channel: Chat, state: FSMContext):
-    user = user_repository.find_by_chat_id(message.from_user.id)
+async def forwarded_from_channel(
+    message: Message,
+    channel: Chat,
+    state: FSMContext,
+    user_repository: UserRepository,
+    post_repository: PostRepository,
+):
+    user = await user_repository.find_by_chat_id(message.from_user.id)
     if not user:
         await message.answer(
             text="⚠️ Вы не зарегистрированы в боте. Пожалуйста, начните с команды /start.",
@@ -1094,10 +1157,10 @@ async def forwarded_from_channel(message: Message, channel: Chat, state: FSMCont
     c_state = await state.get_state()
     if c_state == PostForm.edit_post:
         try:
-            post = post_repository.get_post_by_chat_id_and_message_id(
+            post = await post_repository.get_post_by_chat_id_and_message_id(
                 str(channel.id), int(message.forward_from_message_id)
             )
-            channels = user_repository.get_all_user_channels(user)
+            channels = await user_repository.get_all_user_channels(user)
             # load post to state
             if post:
                 if post.user_id != user.id:
@@ -1124,6 +1187,7 @@ async def forwarded_from_channel(message: Message, channel: Chat, state: FSMCont
                             "media_file_name": post.post_media_file.media_file_name,
                             "media_file_position": post.post_media_file.media_file_position,
                             "media_file_type": post.post_media_file.media_file_type,
+                            "media_file_id": post.post_media_file.media_file_id,
                         }
                     )
                 # set time_frames and auto_repeat_dates
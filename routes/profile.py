@@ -1,3 +1,5 @@
+import zoneinfo
+
 from aiogram import F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
@@ -7,32 +9,43 @@ from aiogram.utils.formatting import BlockQuote, TextLink
 from keyboard.keyboard import (
     GeneralSettingsButtonData,
     get_confirm_auto_repeat_keyboard,
+    get_general_settings_back_keyboard,
     get_general_settings_keyboard,
     get_multiposting_keyboard,
     get_post_jobs_keyboard,
     get_post_multiposting_keyboard,
     get_settings_multiposting_keyboard,
 )
-from repositories import user_repository
+from models.User import DEFAULT_TIMEZONE
+from repositories import UserRepository
 from states.post import PostForm
-from utils.messages import get_confirm_auto_repeat_message, get_multiposting_message
+from utils.jobstore import JobKey
+from utils.messages import (
+    get_confirm_auto_repeat_message,
+    get_multiposting_message,
+    get_schedule_spread_message,
+    get_timezone_message,
+)
 from utils.scheduler import (
     get_all_jobs_by_user_id,
     parse_time_from_str,
     remove_job_by_id,
     remove_job_by_time_interval,
 )
+from utils.smoothing import MAX_SCHEDULE_SPREAD_MINUTES, SCHEDULE_SPREAD_MINUTES
 
 from . import user_router
 
 
 @user_router.message(Command("profile"))
 @user_router.message(F.text == "Мой профиль")
-async def show_profile_handler(message: Message) -> None:
-    user = user_repository.find_by_chat_id(message.from_user.id)
+async def show_profile_handler(
+    message: Message, user_repository: UserRepository
+) -> None:
+    user = await user_repository.find_by_chat_id(message.from_user.id)
     user_link = TextLink(user.full_name, url=f"https://t.me/{user.username}")
-    count_channels = user_repository.count_channels(user)
-    count_posts = user_repository.count_posts(user)
+    count_channels = await user_repository.count_channels(user)
+    count_posts = await user_repository.count_posts(user)
     await message.answer(
         text=f"<b>Имя: {user.full_name}</b>\n<b>ID:<code>{user.chat_id}</code></b>\n<b>Cсылка: {user_link.as_html()}</b>\n\n<b>📣 Каналов/чатов: <code>{count_channels}</code></b>\n<b>👥 Постов: <code>{count_posts}</code></b>",
         reply_to_message_id=message.message_id,
@@ -42,11 +55,10 @@ async def show_profile_handler(message: Message) -> None:
 @user_router.message(Command("settings"))
 @user_router.message(F.text == "Настройки")
 async def show_settings_handler(
-    message: Message,
-    state: FSMContext,
+    message: Message, state: FSMContext, user_repository: UserRepository
 ) -> None:
-    user = user_repository.find_by_chat_id(message.from_user.id)
-    multiposting = user_repository.get_multiposting_by_user_id(user.id)
+    user = await user_repository.find_by_chat_id(message.from_user.id)
+    multiposting = await user_repository.get_multiposting_by_user_id(user.id)
     await state.set_state(PostForm.settings)
     if multiposting:
         time_frames = multiposting.time_frames.split("|")
@@ -69,9 +81,12 @@ async def show_settings_handler(
     GeneralSettingsButtonData.filter(F.type == "general_settings_action")
 )
 async def show_general_settings_handler(
-    query: CallbackQuery, state: FSMContext, callback_data: GeneralSettingsButtonData
+    query: CallbackQuery,
+    state: FSMContext,
+    callback_data: GeneralSettingsButtonData,
+    user_repository: UserRepository,
 ) -> None:
-    user = user_repository.find_by_chat_id(query.from_user.id)
+    user = await user_repository.find_by_chat_id(query.from_user.id)
     state_data = await state.get_data()
 
     if callback_data.action == "back":
@@ -85,7 +100,7 @@ async def show_general_settings_handler(
 
     if callback_data.action == "show_posting_tasks":
         time_frames = state_data.get("time_frames")
-        jobs, stop_jobs = get_all_jobs_by_user_id(time_frames, user.id)
+        jobs, stop_jobs = await get_all_jobs_by_user_id(time_frames, user.id)
         await query.message.edit_text(
             f"📋 <b>Задачи публикации постов:</b>\n\n<b>Всего задач: <code>{len(jobs)}</code></b>",
             reply_markup=get_post_jobs_keyboard(state_data, jobs),
@@ -94,7 +109,7 @@ async def show_general_settings_handler(
 
     if callback_data.action == "active_multiposting_timeframe":
         status = "on" if state_data.get("time_frames_active") == "off" else "off"
-        user_repository.update_multiposting_active_timeframe(user, status)
+        await user_repository.update_multiposting_active_timeframe(user, status)
         await state.update_data(time_frames_active=status)
         state_data = await state.get_data()
         await query.message.edit_reply_markup(
@@ -105,15 +120,18 @@ async def show_general_settings_handler(
     if callback_data.action == "delete_post_job":
         time_frames = state_data.get("time_frames")
         job_index = int(callback_data.data)
-        jobs, stop_jobs = get_all_jobs_by_user_id(time_frames, user.id)
+        jobs, stop_jobs = await get_all_jobs_by_user_id(time_frames, user.id)
 
         if not len(jobs):
             return
 
         job = remove_job_by_id(jobs[job_index].id)
 
-        if len(stop_jobs):
-            remove_job_by_id(stop_jobs[job_index].id)
+        # Задача остановки ищется по ключу рассылки, а не по позиции в списке
+        key = JobKey.from_job_id(jobs[job_index].id)
+        stop_job_id = key._replace(kind="stop").job_id if key else None
+        if stop_job_id in {stop_job.id for stop_job in stop_jobs}:
+            remove_job_by_id(stop_job_id)
 
         if job:
             # remove element from jobs list
@@ -132,8 +150,8 @@ async def show_general_settings_handler(
             )
 
     if callback_data.action == "delete_multiposting_timeframe":
-        user_repository.delete_multiposting_timeframe(user)
-        remove_job_by_time_interval(state_data.get("time_frames"), user.id)
+        await user_repository.delete_multiposting_timeframe(user)
+        await remove_job_by_time_interval(state_data.get("time_frames"), user.id)
 
         await state.update_data(time_frames=None)
         state_data = await state.get_data()
@@ -166,12 +184,86 @@ async def show_general_settings_handler(
             ),
         )
 
+    if callback_data.action == "show_schedule_spread":
+        await state.set_state(PostForm.settings_schedule_spread)
+        await query.message.edit_text(
+            get_schedule_spread_message(
+                user.schedule_spread_minutes,
+                SCHEDULE_SPREAD_MINUTES,
+                MAX_SCHEDULE_SPREAD_MINUTES,
+            ),
+            inline_message_id=query.inline_message_id,
+            reply_markup=get_general_settings_back_keyboard(),
+        )
+
+    if callback_data.action == "show_timezone":
+        await state.set_state(PostForm.settings_timezone)
+        await query.message.edit_text(
+            get_timezone_message(user.effective_timezone, user.timezone_selected),
+            inline_message_id=query.inline_message_id,
+            reply_markup=get_general_settings_back_keyboard(),
+        )
+
+
+@user_router.message(PostForm.settings_schedule_spread)
+async def update_schedule_spread_handler(
+    message: Message, state: FSMContext, user_repository: UserRepository
+) -> None:
+    user = await user_repository.find_by_chat_id(message.from_user.id)
+    value = (message.text or "").strip()
+    if value == "-":
+        minutes = None
+    elif value.isdigit() and int(value) <= MAX_SCHEDULE_SPREAD_MINUTES:
+        minutes = int(value)
+    else:
+        await message.answer(
+            text=f"⚠️ Введите число минут от 0 до {MAX_SCHEDULE_SPREAD_MINUTES} или <code>-</code>.",
+            reply_to_message_id=message.message_id,
+            reply_markup=get_general_settings_back_keyboard(),
+        )
+        return
+
+    await user_repository.update_schedule_spread(user, minutes)
+
+    await message.answer(
+        text=get_schedule_spread_message(
+            minutes, SCHEDULE_SPREAD_MINUTES, MAX_SCHEDULE_SPREAD_MINUTES
+        ),
+        reply_markup=get_general_settings_back_keyboard(),
+    )
+
+
+@user_router.message(PostForm.settings_timezone)
+async def update_timezone_handler(
+    message: Message, state: FSMContext, user_repository: UserRepository
+) -> None:
+    user = await user_repository.find_by_chat_id(message.from_user.id)
+    value = (message.text or "").strip()
+    timezone = None
+    if value != "-":
+        try:
+            timezone = zoneinfo.ZoneInfo(value).key
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            await message.answer(
+                text="⚠️ Неизвестный часовой пояс, например <code>Europe/Kyiv</code>. Повторите ввод.",
+                reply_to_message_id=message.message_id,
+                reply_markup=get_general_settings_back_keyboard(),
+            )
+            return
+
+    await user_repository.update_timezone(user, timezone)
+
+    await message.answer(
+        text=get_timezone_message(timezone or DEFAULT_TIMEZONE, timezone is not None),
+        reply_markup=get_general_settings_back_keyboard(),
+    )
+
 
 @user_router.message(PostForm.settings_time_frames)
 async def create_settings_time_frames_start_handler(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, user_repository: UserRepository
 ) -> None:
-    user = user_repository.find_by_chat_id(message.from_user.id)
+    user = await user_repository.find_by_chat_id(message.from_user.id)
     state_data = await state.get_data()
     time_frames = message.text.split(",")
     time_frames = [
@@ -201,7 +293,7 @@ async def create_settings_time_frames_start_handler(
 
     await state.update_data(time_frames=time_frames_list)
 
-    user_repository.create_multiposting(user, time_frames_list)
+    await user_repository.create_multiposting(user, time_frames_list)
 
     state_data = await state.get_data()
 
@@ -212,8 +304,10 @@ async def create_settings_time_frames_start_handler(
 
 
 @user_router.message(PostForm.time_frames)
-async def create_time_frames_handler(message: Message, state: FSMContext) -> None:
-    user = user_repository.find_by_chat_id(message.from_user.id)
+async def create_time_frames_handler(
+    message: Message, state: FSMContext, user_repository: UserRepository
+) -> None:
+    user = await user_repository.find_by_chat_id(message.from_user.id)
     state_data = await state.get_data()
     time_frames = message.text.split(",")
     auto_repeat_dates = state_data.get("auto_repeat_dates", [])
@@ -244,7 +338,7 @@ async def create_time_frames_handler(message: Message, state: FSMContext) -> Non
 
     await state.update_data(time_frames=time_frames_list)
 
-    user_repository.create_multiposting(user, time_frames_list)
+    await user_repository.create_multiposting(user, time_frames_list)
 
     state_data = await state.get_data()
 
@@ -13,6 +13,8 @@ class PostForm(StatesGroup):
     auto_remove_datetime = State(state="2d")
     admin_message = State()
     settings_time_frames = State()
+    settings_schedule_spread = State()
+    settings_timezone = State()
     time_frames = State()
     active_state = "on"
     time_frames_active = "on"
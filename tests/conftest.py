@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Тесты всегда работают с временной SQLite базой (настройки читаются при
+# импорте models), DATABASE_URL окружения никогда не используется
+os.environ["DATABASE_URL"] = (
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+os.environ["BOT_TOKEN"] = "123456:TEST"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,64 @@
+import asyncio
+
+from sqlalchemy import event
+
+from models import create_all, engine, get_session
+from repositories import PostRepository, UserRepository
+
+
+def test_get_post_for_delivery_uses_two_selects():
+    """
+    Пост с 30 каналами, реакциями, кнопками и медиа загружается
+    двумя SELECT независимо от количества каналов.
+    """
+
+    async def run():
+        await create_all()
+        async with get_session() as session:
+            user_repository = UserRepository(session)
+            user = await user_repository.create(1, "user", "User", "Europe/Kyiv")
+            for i in range(30):
+                await user_repository.add_channel(user, str(-1000 - i), f"c{i}", "chat")
+            channels = await user_repository.get_all_user_channels(user)
+            post = await PostRepository(session).create_post(
+                user,
+                {
+                    "text": "text",
+                    "chat_channel_list": [
+                        {"id": channel.id, "checked": "on"} for channel in channels
+                    ],
+                    "reactions": ["👍", "👎"],
+                    "buttons": [
+                        {"name": "a", "url": "https://a", "row": 0, "column": 0},
+                        {"name": "b", "url": "https://b", "row": 0, "column": 1},
+                    ],
+                    "media_file_name": "a.jpg",
+                    "media_file_id": "file-id",
+                    "media_file_path": "media/a.jpg",
+                    "media_file_type": "photo",
+                    "media_file_position": "top_preview",
+                },
+            )
+
+        statements = []
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+        try:
+            async with get_session() as session:
+                loaded = await PostRepository(session).get_post_for_delivery(post.id)
+                assert len(loaded.channels) == 30
+                assert len(loaded.post_reaction_buttons) == 2
+                assert len(loaded.post_keyboards) == 2
+                assert loaded.post_media_file is not None
+                assert loaded.user.chat_id == 1
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+            await engine.dispose()
+
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 2
+
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+import datetime
+import os
+
+from apscheduler.triggers.base import BaseTrigger
+
+# Что делать с запусками рассылки, пропущенными пока бот не работал:
+# skip - пропустить до следующего запуска по расписанию,
+# coalesce - отправить один раз сразу после старта,
+# spread - отправить один раз, распределив посты на MISFIRE_SPREAD_MINUTES
+MISFIRE_POLICIES = ("skip", "coalesce", "spread")
+MISFIRE_POLICY = os.getenv("MISFIRE_POLICY", "coalesce")
+MISFIRE_SPREAD_MINUTES = int(os.getenv("MISFIRE_SPREAD_MINUTES", "10"))
+# На сколько секунд запуск может опоздать во время работы бота
+MISFIRE_GRACE_TIME = int(os.getenv("MISFIRE_GRACE_TIME", "300"))
+# Верхняя граница подсчёта пропущенных запусков одной задачи
+MAX_COUNTED_MISSED_RUNS = 10000
+
+
+def count_missed_runs(
+    trigger: BaseTrigger,
+    next_run_time: datetime.datetime | None,
+    now: datetime.datetime,
+) -> tuple[int, datetime.datetime | None]:
+    """
+    Считает запуски триггера, время которых прошло.
+    :param trigger: Триггер задачи.
+    :param next_run_time: Сохранённое время следующего запуска.
+    :param now: Текущее время (aware).
+    :return: Количество пропущенных запусков и первое время запуска после now
+        (None - у триггера запусков больше нет).
+    """
+    missed = 0
+    while next_run_time and next_run_time <= now:
+        missed += 1
+        if missed >= MAX_COUNTED_MISSED_RUNS:
+            return missed, trigger.get_next_fire_time(None, now)
+        next_run_time = trigger.get_next_fire_time(next_run_time, now)
+    return missed, next_run_time
+
+
+def plan_catch_up(
+    overdue: list[tuple[str, BaseTrigger, datetime.datetime]],
+    now: datetime.datetime,
+    policy: str = MISFIRE_POLICY,
+) -> tuple[dict[str, datetime.datetime | None], dict]:
+    """
+    Считает новое время запуска просроченных задач рассылки по политике.
+    :param overdue: Список (ID задачи, триггер, сохранённое время запуска).
+    :param now: Текущее время (aware).
+    :param policy: skip, coalesce или spread.
+    :return: ID задачи -> новое время запуска (None - задачу нужно удалить)
+        и метрики: сколько запусков пропущено, повторено и отброшено.
+    """
+    if policy not in MISFIRE_POLICIES:
+        print(f"Unknown misfire policy {policy}, using coalesce")
+        policy = "coalesce"
+
+    stats = {
+        "policy": policy,
+        "jobs": len(overdue),
+        "missed": 0,
+        "replayed": 0,
+        "dropped": 0,
+    }
+    plan = {}
+    step = datetime.timedelta(minutes=MISFIRE_SPREAD_MINUTES) / max(len(overdue), 1)
+    for index, (job_id, trigger, next_run_time) in enumerate(overdue):
+        missed, next_after_now = count_missed_runs(trigger, next_run_time, now)
+        stats["missed"] += missed
+        if policy == "skip":
+            plan[job_id] = next_after_now
+            stats["dropped"] += missed
+            continue
+
+        # Пропущенные запуски объединяются в один
+        plan[job_id] = now + step * index if policy == "spread" else now
+        stats["replayed"] += 1
+        stats["dropped"] += missed - 1
+    return plan, stats
@@ -0,0 +1,105 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable
+
+from models import get_session
+from repositories.delivery_repository import DELIVERY_TASK_TIMEOUT, DeliveryRepository
+
+# all - один процесс: polling, планировщик и доставка (как раньше),
+# bot - только обработка апдейтов (main.py), доставка ставится в очередь,
+# worker - планировщик и доставка из очереди (worker.py)
+PROCESS_ROLE = os.getenv("PROCESS_ROLE", "all")
+DELIVERY_QUEUE = PROCESS_ROLE in ("bot", "worker")
+# Как часто воркер проверяет пустую очередь (сек.)
+DELIVERY_POLL_INTERVAL = float(os.getenv("DELIVERY_POLL_INTERVAL", "2"))
+# Сколько постов воркер доставляет одновременно
+DELIVERY_WORKER_CONCURRENCY = int(os.getenv("DELIVERY_WORKER_CONCURRENCY", "5"))
+# Как часто воркер продлевает задачу, которую доставляет (сек.)
+DELIVERY_HEARTBEAT_INTERVAL = DELIVERY_TASK_TIMEOUT / 3
+# Сколько раз пытаться записать итог задачи доставки
+DELIVERY_FINISH_ATTEMPTS = 3
+
+
+class DeliveryError(Exception):
+    """
+    Рассылка поста не удалась, задачу нужно повторить позже.
+    """
+
+
+async def enqueue_delivery(post_ids: list[int]) -> None:
+    async with get_session() as session:
+        await DeliveryRepository(session).enqueue(post_ids)
+
+
+async def run_delivery_worker(deliver: Callable[[int, str], Awaitable[Any]]) -> None:
+    """
+    Забирает задачи из очереди доставки и отправляет посты.
+    Воркеров может быть несколько: задачи делятся через SKIP LOCKED.
+    :param deliver: Корутина, отправляющая пост по ID и ID запуска
+        (повтор задачи продолжает тот же запуск); исключение
+        возвращает задачу в очередь через DELIVERY_RETRY_DELAY.
+    """
+
+    async def heartbeat(task_id: int):
+        while True:
+            await asyncio.sleep(DELIVERY_HEARTBEAT_INTERVAL)
+            try:
+                async with get_session() as session:
+                    await DeliveryRepository(session).extend(task_id)
+            except Exception as e:
+                print(f"Error extending delivery task {task_id}: {e}")
+
+    async def finish_task(task_id: int, delivered: bool):
+        # Итог задачи пишется с повторами: если он потеряется, задачу
+        # заберут снова после DELIVERY_TASK_TIMEOUT
+        for attempt in range(1, DELIVERY_FINISH_ATTEMPTS + 1):
+            try:
+                async with get_session() as session:
+                    repository = DeliveryRepository(session)
+                    if delivered:
+                        await repository.complete(task_id)
+                    else:
+                        await repository.retry_later(task_id)
+                return
+            except Exception as e:
+                print(
+                    f"Error finishing delivery task {task_id} "
+                    f"(attempt {attempt}): {e}"
+                )
+                await asyncio.sleep(attempt)
+
+    async def run_task(task_id: int, post_id: int):
+        # Пока пост рассылается, задача продлевается: длинную рассылку
+        # не заберёт и не отправит повторно другой воркер
+        heartbeat_task = asyncio.create_task(heartbeat(task_id))
+        delivered = False
+        try:
+            await deliver(post_id, f"task-{task_id}")
+            delivered = True
+        except Exception as e:
+            print(f"Error delivering post {post_id}: {e}")
+        finally:
+            heartbeat_task.cancel()
+        await finish_task(task_id, delivered)
+
+    while True:
+        try:
+            async with get_session() as session:
+                tasks = await DeliveryRepository(session).claim(
+                    DELIVERY_WORKER_CONCURRENCY
+                )
+        except Exception as e:
+            print(f"Error claiming delivery tasks: {e}")
+            tasks = []
+
+        if not tasks:
+            await asyncio.sleep(DELIVERY_POLL_INTERVAL)
+            continue
+
+        results = await asyncio.gather(
+            *[run_task(task.id, task.post_id) for task in tasks],
+            return_exceptions=True,
+        )
+        for task, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                print(f"Error running delivery task {task.id}: {result}")
@@ -0,0 +1,205 @@
+import datetime
+import os
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import Engine, and_, or_, select
+
+from models import DispatchSlot
+from models.User import get_zoneinfo
+from utils.jobstore import JobKey, to_utc
+from utils.smoothing import shift_time_of_day
+
+# jobs - задача APScheduler на каждый интервал поста,
+# bucketed - строки dispatch_slots и один поминутный тик
+DISPATCH_MODE = os.getenv("DISPATCH_MODE", "jobs")
+BUCKETED_DISPATCH = DISPATCH_MODE == "bucketed"
+# Сколько слотов забирает один тик
+DISPATCH_BATCH_SIZE = int(os.getenv("DISPATCH_BATCH_SIZE", "1000"))
+# Сколько постов тик отправляет одновременно
+DISPATCH_POST_CONCURRENCY = int(os.getenv("DISPATCH_POST_CONCURRENCY", "5"))
+
+
+def from_utc(run_time: datetime.datetime | None) -> datetime.datetime | None:
+    if run_time is None:
+        return None
+    return run_time.replace(tzinfo=datetime.timezone.utc)
+
+
+class DispatchSlotStore:
+    """
+    Хранилище слотов рассылки (таблица dispatch_slots). Работает через
+    синхронный engine jobstore-а, как и остальная часть планировщика.
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.slots_t = DispatchSlot.__table__
+
+    def start(self) -> None:
+        self.slots_t.create(self.engine, True)
+
+    @staticmethod
+    def build_trigger(slot) -> BaseTrigger:
+        """
+        Восстанавливает триггер APScheduler по строке слота.
+        """
+        options = {
+            "start_date": from_utc(slot.start_at),
+            "end_date": from_utc(slot.end_at),
+            "timezone": get_zoneinfo(slot.timezone),
+        }
+        if slot.trigger_type == "interval":
+            return IntervalTrigger(hours=slot.hour, minutes=slot.minute, **options)
+        hour, minute, second = shift_time_of_day(
+            slot.hour, slot.minute, slot.run_offset
+        )
+        return CronTrigger(hour=hour, minute=minute, second=second, **options)
+
+    def add_slot(
+        self,
+        key: JobKey,
+        trigger: IntervalTrigger | CronTrigger,
+        next_run_time: datetime.datetime | None = None,
+        offset: int = 0,
+    ) -> None:
+        """
+        Создаёт или заменяет слот рассылки поста.
+        :param key: Ключ задачи рассылки.
+        :param trigger: Триггер, по которому считается время отправки.
+        :param next_run_time: Время первой отправки (по умолчанию - по триггеру).
+        :param offset: Сдвиг cron-запуска относительно key.hour:key.minute (сек.)
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        next_run_time = next_run_time or trigger.get_next_fire_time(None, now)
+        with self.engine.begin() as connection:
+            connection.execute(
+                self.slots_t.delete().where(self.slots_t.c.job_id == key.job_id)
+            )
+            if not next_run_time:
+                return
+            connection.execute(
+                self.slots_t.insert().values(
+                    job_id=key.job_id,
+                    user_id=key.user_id,
+                    post_id=key.post_id,
+                    trigger_type=key.trigger_type,
+                    hour=key.hour,
+                    minute=key.minute,
+                    run_offset=offset,
+                    timezone=str(trigger.timezone),
+                    start_at=to_utc(trigger.start_date),
+                    end_at=to_utc(trigger.end_date),
+                    next_run_at=to_utc(next_run_time),
+                )
+            )
+
+    def get_slots(
+        self,
+        user_id: int | None = None,
+        post_id: int | None = None,
+        time_frames: list[tuple[str, int, int]] | None = None,
+    ) -> list:
+        """
+        Возвращает слоты (поле id - ID задачи) одним запросом.
+        """
+        slots = self.slots_t.c
+        query = select(
+            slots.job_id.label("id"), slots.post_id, slots.user_id, slots.next_run_at
+        )
+        if user_id is not None:
+            query = query.where(slots.user_id == user_id)
+        if post_id is not None:
+            query = query.where(slots.post_id == post_id)
+        if time_frames is not None:
+            query = query.where(
+                or_(
+                    False,
+                    *[
+                        and_(
+                            slots.trigger_type == trigger_type,
+                            slots.hour == hour,
+                            slots.minute == minute,
+                        )
+                        for trigger_type, hour, minute in time_frames
+                    ],
+                )
+            )
+        with self.engine.begin() as connection:
+            return connection.execute(query.order_by(slots.next_run_at)).all()
+
+    def remove_slot(self, job_id: str) -> bool:
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                self.slots_t.delete().where(self.slots_t.c.job_id == job_id)
+            )
+            return result.rowcount > 0
+
+    def get_overdue_slots(self, now: datetime.datetime) -> list:
+        """
+        Возвращает слоты, время которых уже прошло (например, после простоя).
+        """
+        with self.engine.begin() as connection:
+            return connection.execute(
+                select(self.slots_t)
+                .where(self.slots_t.c.next_run_at <= to_utc(now))
+                .order_by(self.slots_t.c.next_run_at)
+            ).all()
+
+    def set_next_run(
+        self, job_id: str, next_run_time: datetime.datetime | None
+    ) -> None:
+        """
+        Переносит слот на новое время, None - удаляет слот.
+        """
+        with self.engine.begin() as connection:
+            if next_run_time is None:
+                connection.execute(
+                    self.slots_t.delete().where(self.slots_t.c.job_id == job_id)
+                )
+                return
+            connection.execute(
+                self.slots_t.update()
+                .where(self.slots_t.c.job_id == job_id)
+                .values(next_run_at=to_utc(next_run_time))
+            )
+
+    def claim_due_slots(self, now: datetime.datetime) -> list[int]:
+        """
+        Забирает слоты, время которых наступило, и переносит их на следующий
+        запуск (пропущенные запуски объединяются в один). Выборка сравнивает
+        только UTC next_run_at, часовой пояс нужен лишь сработавшим слотам.
+        :param now: Текущее время (aware).
+        :return: ID постов для отправки.
+        """
+        post_ids = []
+        with self.engine.begin() as connection:
+            due_slots = connection.execute(
+                select(self.slots_t)
+                .where(self.slots_t.c.next_run_at <= to_utc(now))
+                .order_by(self.slots_t.c.next_run_at)
+                .limit(DISPATCH_BATCH_SIZE)
+                # Слот, уже забранный другим процессом, пропускается
+                .with_for_update(skip_locked=True)
+            ).all()
+            finished_ids = []
+            for slot in due_slots:
+                post_ids.append(slot.post_id)
+                trigger = self.build_trigger(slot)
+                next_run_time = from_utc(slot.next_run_at)
+                while next_run_time and next_run_time <= now:
+                    next_run_time = trigger.get_next_fire_time(next_run_time, now)
+                if next_run_time:
+                    connection.execute(
+                        self.slots_t.update()
+                        .where(self.slots_t.c.id == slot.id)
+                        .values(next_run_at=to_utc(next_run_time))
+                    )
+                else:
+                    finished_ids.append(slot.id)
+            if finished_ids:
+                connection.execute(
+                    self.slots_t.delete().where(self.slots_t.c.id.in_(finished_ids))
+                )
+        return list(dict.fromkeys(post_ids))
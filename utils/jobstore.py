@@ -0,0 +1,276 @@
+import datetime
+import pickle
+import re
+from typing import NamedTuple
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from models import ScheduledJob
+
+SEND_JOB_ID_RE = re.compile(
+    r"^(?P<user_id>\d+)_(?P<post_id>\d+)_(?P<hour>\d+|None)_(?P<minute>\d+|None)"
+    r"_(?P<trigger_type>interval|cron)(?P<stop>_stop_job)?$"
+)
+REMOVE_JOB_ID_RE = re.compile(
+    r"^(?P<user_id>\d+)_(?P<post_id>\d+)_(?P<chat_id>-?\d+)_(?P<message_id>\d+)_remove$"
+)
+
+
+class JobKey(NamedTuple):
+    """
+    Идентичность задачи поста. ID задачи APScheduler строится только здесь
+    (формат совместим с уже сохранёнными задачами).
+    """
+
+    user_id: int
+    post_id: int
+    kind: str
+    trigger_type: str | None = None
+    hour: int | None = None
+    minute: int | None = None
+    chat_id: str | None = None
+    message_id: int | None = None
+
+    @property
+    def job_id(self) -> str:
+        if self.kind == "remove":
+            return (
+                f"{self.user_id}_{self.post_id}_{self.chat_id}_{self.message_id}_remove"
+            )
+        job_id = f"{self.user_id}_{self.post_id}_{self.hour}_{self.minute}_{self.trigger_type}"
+        return f"{job_id}_stop_job" if self.kind == "stop" else job_id
+
+    @classmethod
+    def from_job_id(cls, job_id: str) -> "JobKey | None":
+        """
+        Восстанавливает ключ по ID задачи, None - задача не относится к посту.
+        """
+        match = SEND_JOB_ID_RE.match(job_id)
+        if match:
+            hour, minute = match.group("hour"), match.group("minute")
+            return cls(
+                user_id=int(match.group("user_id")),
+                post_id=int(match.group("post_id")),
+                kind="stop" if match.group("stop") else "send",
+                trigger_type=match.group("trigger_type"),
+                hour=None if hour == "None" else int(hour),
+                minute=None if minute == "None" else int(minute),
+            )
+        match = REMOVE_JOB_ID_RE.match(job_id)
+        if match:
+            return cls(
+                user_id=int(match.group("user_id")),
+                post_id=int(match.group("post_id")),
+                kind="remove",
+                chat_id=match.group("chat_id"),
+                message_id=int(match.group("message_id")),
+            )
+        return None
+
+
+def to_utc(run_time: datetime.datetime | None) -> datetime.datetime | None:
+    if run_time is None:
+        return None
+    return run_time.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class IndexedSQLAlchemyJobStore(SQLAlchemyJobStore):
+    """
+    SQLAlchemyJobStore, который ведёт реестр задач (таблица scheduled_jobs)
+    с типизированными полями, чтобы задачи пользователя или поста
+    выбирались одним запросом по индексу.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.registry_t = ScheduledJob.__table__
+
+    def start(self, scheduler, alias) -> None:
+        super().start(scheduler, alias)
+        self.registry_t.create(self.engine, True)
+        self.sync_registry()
+
+    @staticmethod
+    def get_registry_row(
+        job_id: str, next_run_time: datetime.datetime | None
+    ) -> dict | None:
+        key = JobKey.from_job_id(job_id)
+        if not key:
+            return None
+        return {
+            "job_id": job_id,
+            "user_id": key.user_id,
+            "post_id": key.post_id,
+            "kind": key.kind,
+            "trigger_type": key.trigger_type,
+            "hour": key.hour,
+            "minute": key.minute,
+            "next_run_time": to_utc(next_run_time),
+        }
+
+    def sync_registry(self) -> None:
+        """
+        Дописывает в реестр задачи jobstore без строки реестра и удаляет
+        строки задач, которых больше нет. Меняются только расхождения
+        (задачи, сохранённые до появления реестра), поэтому запуск на
+        нескольких репликах одновременно не стирает чужие записи.
+        """
+        registry = self.registry_t.c
+        with self.engine.begin() as connection:
+            jobs = connection.execute(
+                select(self.jobs_t.c.id, self.jobs_t.c.next_run_time).where(
+                    self.jobs_t.c.id.not_in(select(registry.job_id))
+                )
+            ).all()
+            connection.execute(
+                self.registry_t.delete().where(
+                    registry.job_id.not_in(select(self.jobs_t.c.id))
+                )
+            )
+        for job_id, next_run_time in jobs:
+            row = self.get_registry_row(
+                job_id, utc_timestamp_to_datetime(next_run_time)
+            )
+            if not row:
+                continue
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(self.registry_t.insert().values(**row))
+            except IntegrityError:
+                # Строку уже записала другая реплика или add_job
+                pass
+
+    def add_job(self, job: Job) -> None:
+        row = self.get_registry_row(job.id, job.next_run_time)
+        with self.engine.begin() as connection:
+            try:
+                connection.execute(
+                    self.jobs_t.insert().values(
+                        id=job.id,
+                        next_run_time=datetime_to_utc_timestamp(job.next_run_time),
+                        job_state=pickle.dumps(
+                            job.__getstate__(), self.pickle_protocol
+                        ),
+                    )
+                )
+            except IntegrityError:
+                raise ConflictingIdError(job.id)
+            # Задача и строка реестра пишутся в одной транзакции
+            if row:
+                connection.execute(
+                    self.registry_t.delete().where(self.registry_t.c.job_id == job.id)
+                )
+                connection.execute(self.registry_t.insert().values(**row))
+
+    def update_job(self, job: Job) -> None:
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                self.jobs_t.update()
+                .values(
+                    next_run_time=datetime_to_utc_timestamp(job.next_run_time),
+                    job_state=pickle.dumps(job.__getstate__(), self.pickle_protocol),
+                )
+                .where(self.jobs_t.c.id == job.id)
+            )
+            if result.rowcount == 0:
+                raise JobLookupError(job.id)
+            connection.execute(
+                self.registry_t.update()
+                .where(self.registry_t.c.job_id == job.id)
+                .values(next_run_time=to_utc(job.next_run_time))
+            )
+
+    def remove_job(self, job_id: str) -> None:
+        with self.engine.begin() as connection:
+            # Строка реестра удаляется, даже если задачи уже нет
+            connection.execute(
+                self.registry_t.delete().where(self.registry_t.c.job_id == job_id)
+            )
+            result = connection.execute(
+                self.jobs_t.delete().where(self.jobs_t.c.id == job_id)
+            )
+        if result.rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(self.jobs_t.delete())
+            connection.execute(self.registry_t.delete())
+
+    def get_registered_posts(
+        self, time_frames: list[tuple[str, int, int]], kinds: tuple[str, ...]
+    ) -> list:
+        """
+        Возвращает (post_id, user_id) постов всех пользователей, у которых
+        есть задачи с этими триггерами, без загрузки самих задач.
+        :param time_frames: Триггеры (trigger_type, hour, minute).
+        :param kinds: Виды задач (send, stop, remove).
+        """
+        registry = self.registry_t.c
+        query = (
+            select(registry.post_id, registry.user_id)
+            .distinct()
+            .where(
+                registry.kind.in_(kinds),
+                or_(
+                    False,
+                    *[
+                        and_(
+                            registry.trigger_type == trigger_type,
+                            registry.hour == hour,
+                            registry.minute == minute,
+                        )
+                        for trigger_type, hour, minute in time_frames
+                    ],
+                ),
+            )
+        )
+        with self.engine.begin() as connection:
+            return connection.execute(query).all()
+
+    def get_registered_jobs(
+        self,
+        user_id: int | None = None,
+        post_id: int | None = None,
+        kinds: tuple[str, ...] | None = None,
+        time_frames: list[tuple[str, int, int]] | None = None,
+        due_before: datetime.datetime | None = None,
+    ) -> list[Job]:
+        """
+        Возвращает задачи по полям реестра одним запросом.
+        :param user_id: ID пользователя.
+        :param post_id: ID поста.
+        :param kinds: Виды задач (send, stop, remove).
+        :param time_frames: Триггеры (trigger_type, hour, minute).
+        :param due_before: Следующий запуск не позже этого времени.
+        """
+        registry = self.registry_t.c
+        job_ids = select(registry.job_id)
+        if user_id is not None:
+            job_ids = job_ids.where(registry.user_id == user_id)
+        if post_id is not None:
+            job_ids = job_ids.where(registry.post_id == post_id)
+        if kinds:
+            job_ids = job_ids.where(registry.kind.in_(kinds))
+        if time_frames is not None:
+            job_ids = job_ids.where(
+                or_(
+                    False,
+                    *[
+                        and_(
+                            registry.trigger_type == trigger_type,
+                            registry.hour == hour,
+                            registry.minute == minute,
+                        )
+                        for trigger_type, hour, minute in time_frames
+                    ],
+                )
+            )
+        if due_before is not None:
+            job_ids = job_ids.where(registry.next_run_time <= to_utc(due_before))
+        return self._get_jobs(self.jobs_t.c.id.in_(job_ids))
@@ -0,0 +1,80 @@
+import datetime
+import os
+import socket
+
+from sqlalchemy import Engine, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from models import SchedulerLease
+
+# ID процесса в аренде, по умолчанию хост:pid
+INSTANCE_ID = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+# Сколько секунд аренда действует без продления
+SCHEDULER_LEASE_TTL = int(os.getenv("SCHEDULER_LEASE_TTL", "30"))
+# Как часто процесс продлевает или пытается захватить аренду (сек.)
+SCHEDULER_LEASE_INTERVAL = int(os.getenv("SCHEDULER_LEASE_INTERVAL", "10"))
+
+
+class SchedulerLeaseStore:
+    """
+    Выбор ведущего планировщика через строку в таблице scheduler_leases.
+    Захват и продление - один условный UPDATE, поэтому из всех процессов
+    аренду держит ровно один. Работает через синхронный engine jobstore-а.
+    """
+
+    def __init__(
+        self, engine: Engine, name: str = "scheduler", holder: str = INSTANCE_ID
+    ) -> None:
+        self.engine = engine
+        self.name = name
+        self.holder = holder
+        self.leases_t = SchedulerLease.__table__
+
+    def start(self) -> None:
+        self.leases_t.create(self.engine, True)
+
+    def try_acquire(self) -> bool:
+        """
+        Продлевает свою аренду или захватывает истёкшую.
+        :return: True - процесс ведущий до следующего продления.
+        """
+        leases = self.leases_t.c
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        expires_at = now + datetime.timedelta(seconds=SCHEDULER_LEASE_TTL)
+        try:
+            with self.engine.begin() as connection:
+                result = connection.execute(
+                    self.leases_t.update()
+                    .where(
+                        leases.name == self.name,
+                        or_(leases.holder == self.holder, leases.expires_at < now),
+                    )
+                    .values(holder=self.holder, expires_at=expires_at)
+                )
+                if result.rowcount > 0:
+                    return True
+                if connection.execute(
+                    select(leases.name).where(leases.name == self.name)
+                ).first():
+                    return False
+                connection.execute(
+                    self.leases_t.insert().values(
+                        name=self.name, holder=self.holder, expires_at=expires_at
+                    )
+                )
+                return True
+        except IntegrityError:
+            # Другой процесс создал аренду одновременно с нами
+            return False
+
+    def release(self) -> None:
+        """
+        Отпускает аренду, чтобы другой процесс забрал её без ожидания TTL.
+        """
+        with self.engine.begin() as connection:
+            connection.execute(
+                self.leases_t.delete().where(
+                    self.leases_t.c.name == self.name,
+                    self.leases_t.c.holder == self.holder,
+                )
+            )
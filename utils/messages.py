@@ -2,8 +2,8 @@ from datetime import datetime
 
 from aiogram.utils.formatting import BlockQuote
 
+from models.TimeFrame import TimeFrame
 from utils import format_date
-from utils.scheduler import parse_schedule_string
 
 
 def get_notify_update_version_message() -> str:
@@ -37,6 +37,58 @@ def get_multiposting_message(time_frames: list) -> str:
 """
 
 
+def get_effective_schedule_message(effective_schedule: list[tuple[str, str]]) -> str:
+    """
+    Сообщение о фактическом расписании, если время отправки было сдвинуто,
+    чтобы посты не уходили в одну секунду с другими.
+    """
+    lines = "\n".join(
+        f"{time_frame} → {effective}" for time_frame, effective in effective_schedule
+    )
+    return (
+        "<b>🕒 Фактическое расписание</b>\n\n"
+        "Чтобы не перегружать каналы, время отправки немного сдвинуто:\n\n"
+        f"{BlockQuote(lines).as_html()}"
+    )
+
+
+def get_schedule_spread_message(
+    spread_minutes: int | None, default_minutes: int, max_minutes: int
+) -> str:
+    """
+    Сообщение настройки окна, в котором разносятся посты с одинаковым временем.
+    """
+    current = (
+        f"{spread_minutes} мин."
+        if spread_minutes is not None
+        else f"по умолчанию ({default_minutes} мин.)"
+    )
+    return (
+        "<b>⏱ Разнесение публикаций</b>\n\n"
+        "Посты с одинаковым временем, которые уходят в одни и те же каналы, "
+        "публикуются с небольшим сдвигом внутри окна, чтобы не выходить в одну секунду.\n\n"
+        f"Отправьте размер окна в минутах (0 - {max_minutes}), 0 - публиковать точно по расписанию, "
+        "<code>-</code> - окно по умолчанию.\n"
+        "Новое окно применяется к задачам, созданным после изменения.\n\n"
+        f"⏰ <b>Текущее окно:</b> <i>{current}</i>"
+    )
+
+
+def get_timezone_message(timezone: str, selected: bool) -> str:
+    """
+    Сообщение настройки часового пояса, в котором планируются посты.
+    """
+    current = timezone if selected else f"по умолчанию ({timezone})"
+    return (
+        "<b>🌍 Часовой пояс</b>\n\n"
+        "Время в расписании постов считается в этом часовом поясе.\n\n"
+        "Отправьте название пояса, например <code>Europe/Kyiv</code>, <code>Europe/Warsaw</code> "
+        "или <code>UTC</code>, <code>-</code> - пояс по умолчанию.\n"
+        "Новый пояс применяется к задачам, созданным после изменения.\n\n"
+        f"⏰ <b>Текущий пояс:</b> <i>{current}</i>"
+    )
+
+
 def get_confirm_auto_repeat_message(
     state_data: dict,
     time_frames_list: list,
@@ -56,7 +108,8 @@ def get_confirm_auto_repeat_message(
 
     for _time_interval in time_frames_list:
 
-        _type, interval = parse_schedule_string(_time_interval)
+        time_frame = TimeFrame.parse(_time_interval)
+        _type, interval = time_frame.trigger_type, time_frame.trigger_params
 
         date_index = 0
 
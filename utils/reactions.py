@@ -0,0 +1,263 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, defaultdict
+
+from aiogram.exceptions import TelegramBadRequest
+
+from bot import bot
+from keyboard.keyboard import get_created_post_keyboard
+from models import Post, get_session
+from repositories.post_repository import PostRepository
+
+# Не чаще одного редактирования клавиатуры сообщения за этот интервал (сек.)
+REACTION_EDIT_INTERVAL = float(os.getenv("REACTION_EDIT_INTERVAL", "1"))
+# Как часто накопленные голоса записываются в базу (сек.)
+REACTION_FLUSH_INTERVAL = float(os.getenv("REACTION_FLUSH_INTERVAL", "2"))
+# Сколько постов держать в кэше счётчиков реакций
+REACTION_CACHE_MAX_POSTS = int(os.getenv("REACTION_CACHE_MAX_POSTS", "1000"))
+# Сколько секунд счётчики поста берутся из кэша, прежде чем перечитать
+# их из базы (голоса, записанные другими процессами)
+REACTION_CACHE_TTL = float(os.getenv("REACTION_CACHE_TTL", "10"))
+# После стольких неудачных записей подряд голоса отбрасываются
+REACTION_FLUSH_MAX_ATTEMPTS = int(os.getenv("REACTION_FLUSH_MAX_ATTEMPTS", "3"))
+
+
+class PostTally:
+    """
+    Закэшированный пост со счётчиками реакций и известными голосами.
+    """
+
+    def __init__(self, post: Post) -> None:
+        self.post = post
+        self.counts = {
+            reaction.id: reaction.reactions_count
+            for reaction in post.post_reaction_buttons
+        }
+        # ID пользователя -> ID реакции (None - не голосовал)
+        self.votes: dict[int, int | None] = {}
+        self.loaded_at = time.monotonic()
+
+
+class ReactionTallyCache:
+    """
+    Кэш счётчиков реакций в памяти процесса с отложенной записью:
+    клики меняют счётчики в кэше, а в базу голоса пишутся пачкой
+    раз в REACTION_FLUSH_INTERVAL секунд. Счётчики в базе считаются
+    по голосам всех процессов; пост перечитывается из базы после записи
+    его голосов и не реже чем раз в REACTION_CACHE_TTL секунд.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = REACTION_FLUSH_INTERVAL,
+        max_posts: int = REACTION_CACHE_MAX_POSTS,
+        ttl: float = REACTION_CACHE_TTL,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.max_posts = max_posts
+        self.ttl = ttl
+        self.tallies: OrderedDict[int, PostTally] = OrderedDict()
+        # Ещё не записанные в базу голоса и их вклад в счётчики кэша
+        self.pending_votes: dict[tuple[int, int], int] = {}
+        self.pending_deltas: defaultdict[int, int] = defaultdict(int)
+        self.failed_flushes = 0
+        self.flush_task: asyncio.Task | None = None
+        self.lock = asyncio.Lock()
+
+    async def get_tally(self, post_id: int) -> PostTally | None:
+        """
+        Возвращает счётчики поста, загружая пост из базы при промахе.
+        :param post_id: ID поста.
+        """
+        tally = self.tallies.get(post_id)
+        if tally and time.monotonic() - tally.loaded_at < self.ttl:
+            self.tallies.move_to_end(post_id)
+            return tally
+
+        async with self.lock:
+            tally = self.tallies.get(post_id)
+            if tally and time.monotonic() - tally.loaded_at < self.ttl:
+                return tally
+            async with get_session() as session:
+                post = await PostRepository(session).get_by_id(post_id)
+            if not post:
+                return None
+            tally = PostTally(post)
+            # Незаписанные изменения ещё не видны в базе
+            for reaction_id in tally.counts:
+                tally.counts[reaction_id] += self.pending_deltas.get(reaction_id, 0)
+            for (vote_post_id, user_id), reaction_id in self.pending_votes.items():
+                if vote_post_id == post_id:
+                    tally.votes[user_id] = reaction_id
+            self.tallies[post_id] = tally
+            while len(self.tallies) > self.max_posts:
+                self.tallies.popitem(last=False)
+            return tally
+
+    async def get_post_and_counts(
+        self, post_id: int
+    ) -> tuple[Post | None, dict[int, int]]:
+        tally = await self.get_tally(post_id)
+        if not tally:
+            return None, {}
+        return tally.post, tally.counts
+
+    async def vote(self, post_id: int, reaction_id: int, user_id: int) -> bool:
+        """
+        Засчитывает голос пользователя (один голос на пост).
+        :param post_id: ID поста.
+        :param reaction_id: ID реакции.
+        :param user_id: ID пользователя.
+        :return: True, если счётчики изменились.
+        """
+        tally = await self.get_tally(post_id)
+        if not tally or reaction_id not in tally.counts:
+            print(f"Reaction with ID {reaction_id} not found")
+            return False
+
+        if user_id not in tally.votes:
+            async with get_session() as session:
+                previous_reaction_id = await PostRepository(
+                    session
+                ).get_user_reaction_id(post_id, user_id)
+            # Пока шёл запрос, голос мог прийти повторным кликом
+            tally.votes.setdefault(user_id, previous_reaction_id)
+
+        previous_reaction_id = tally.votes[user_id]
+        if previous_reaction_id == reaction_id:
+            return False
+
+        if previous_reaction_id in tally.counts:
+            tally.counts[previous_reaction_id] -= 1
+            self.pending_deltas[previous_reaction_id] -= 1
+        tally.counts[reaction_id] += 1
+        self.pending_deltas[reaction_id] += 1
+        tally.votes[user_id] = reaction_id
+        self.pending_votes[(post_id, user_id)] = reaction_id
+
+        if not self.flush_task:
+            self.flush_task = asyncio.create_task(self._delayed_flush())
+        return True
+
+    def invalidate(self, post_id: int) -> None:
+        """
+        Удаляет пост из кэша (после редактирования поста).
+        :param post_id: ID поста.
+        """
+        self.tallies.pop(post_id, None)
+
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+        finally:
+            self.flush_task = None
+            if self.pending_votes:
+                self.flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def flush(self) -> None:
+        """
+        Записывает накопленные голоса в базу.
+        """
+        async with self.lock:
+            if not self.pending_votes:
+                return
+            votes, deltas = self.pending_votes, dict(self.pending_deltas)
+            self.pending_votes, self.pending_deltas = {}, defaultdict(int)
+            async with get_session() as session:
+                saved = await PostRepository(session).save_reaction_votes(votes)
+            post_ids = {post_id for post_id, _ in votes}
+            if saved:
+                self.failed_flushes = 0
+                # Счётчики в базе пересчитаны, в том числе с голосами
+                # других процессов
+                for post_id in post_ids:
+                    self.invalidate(post_id)
+                return
+
+            self.failed_flushes += 1
+            if self.failed_flushes < REACTION_FLUSH_MAX_ATTEMPTS:
+                # Вернём изменения в очередь, новые голоса важнее старых
+                self.pending_votes = votes | self.pending_votes
+                for reaction_id, delta in deltas.items():
+                    self.pending_deltas[reaction_id] += delta
+                return
+
+            self.failed_flushes = 0
+            print(
+                f"Dropping {len(votes)} reaction votes "
+                f"after {REACTION_FLUSH_MAX_ATTEMPTS} failed flushes"
+            )
+            # Счётчики в кэше учитывают отброшенные голоса
+            for post_id in post_ids:
+                self.invalidate(post_id)
+
+
+class ReactionKeyboardDebouncer:
+    """
+    Объединяет обновления клавиатуры реакций одного сообщения:
+    первый клик обновляет клавиатуру сразу, клики в течение интервала -
+    одним редактированием в конце интервала с актуальными счётчиками.
+    """
+
+    def __init__(self, interval: float = REACTION_EDIT_INTERVAL) -> None:
+        self.interval = interval
+        self.dirty: set[tuple] = set()
+        self.tasks: dict[tuple, asyncio.Task] = {}
+
+    def schedule(
+        self,
+        post_id: int,
+        chat_id: int | None = None,
+        message_id: int | None = None,
+        inline_message_id: str | None = None,
+    ) -> None:
+        """
+        Помечает клавиатуру сообщения как устаревшую.
+        :param post_id: ID поста.
+        :param chat_id: ID чата сообщения.
+        :param message_id: ID сообщения.
+        :param inline_message_id: ID inline сообщения.
+        """
+        key = (post_id, chat_id, message_id, inline_message_id)
+        self.dirty.add(key)
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.create_task(self._refresh(key))
+
+    async def _refresh(self, key: tuple) -> None:
+        try:
+            while key in self.dirty:
+                self.dirty.discard(key)
+                await self._edit(*key)
+                await asyncio.sleep(self.interval)
+        finally:
+            self.tasks.pop(key, None)
+
+    async def _edit(
+        self,
+        post_id: int,
+        chat_id: int | None,
+        message_id: int | None,
+        inline_message_id: str | None,
+    ) -> None:
+        try:
+            post, counts = await reaction_tally_cache.get_post_and_counts(post_id)
+            if not post:
+                return
+            await bot.edit_message_reply_markup(
+                chat_id=chat_id,
+                message_id=message_id,
+                inline_message_id=inline_message_id,
+                reply_markup=get_created_post_keyboard(post, counts),
+            )
+        except TelegramBadRequest as e:
+            # message is not modified - счётчики не изменились
+            if "not modified" not in str(e):
+                print(f"Error updating reactions keyboard: {e}")
+        except Exception as e:
+            print(f"Error updating reactions keyboard: {e}")
+
+
+reaction_tally_cache = ReactionTallyCache()
+reaction_keyboard_debouncer = ReactionKeyboardDebouncer()
@@ -0,0 +1,114 @@
+import datetime
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from apscheduler.events import (
+  EVENT_JOB_ERROR,
+  EVENT_JOB_EXECUTED,
+  EVENT_JOB_MISSED,
+  EVENT_JOB_MODIFIED,
+  EVENT_JOB_REMOVED,
+  EVENT_JOB_SUBMITTED,
+  JobEvent,
+  JobExecutionEvent,
+  JobSubmissionEvent,
+)
+
+JOB_EVENTS_MASK = (
+    EVENT_JOB_SUBMITTED
+    | EVENT_JOB_EXECUTED
+    | EVENT_JOB_ERROR
+    | EVENT_JOB_MISSED
+    | EVENT_JOB_MODIFIED
+    | EVENT_JOB_REMOVED
+)
+
+EVENT_NAMES = {
+    EVENT_JOB_SUBMITTED: "submitted",
+    EVENT_JOB_EXECUTED: "executed",
+    EVENT_JOB_ERROR: "error",
+    EVENT_JOB_MISSED: "missed",
+    EVENT_JOB_MODIFIED: "modified",
+    EVENT_JOB_REMOVED: "removed",
+}
+
+# Сколько запусков, ожидающих завершения, помнит пайплайн
+MAX_TRACKED_RUNS = 10000
+
+
+def print_job_event(event: dict[str, Any]) -> None:
+    """
+    Приёмник событий по умолчанию - печатает событие одной строкой.
+    """
+    details = " ".join(
+        f"{key}={value}"
+        for key, value in event.items()
+        if key not in ("type", "job_id") and value is not None
+    )
+    print(f"Job {event['job_id']} {event['type']} {details}".rstrip())
+
+
+class JobEventPipeline:
+    """
+    Единственный listener планировщика: превращает события APScheduler
+    в словари (тип, задача, задержка запуска, длительность, ошибка)
+    и передаёт их в приёмник (sink).
+    """
+
+    def __init__(self, sink: Callable[[dict[str, Any]], None] = print_job_event):
+        self.sink = sink
+        # (job_id, scheduled_run_time) -> время отправки на выполнение
+        self.running: OrderedDict[tuple, float] = OrderedDict()
+
+    def set_sink(self, sink: Callable[[dict[str, Any]], None]) -> None:
+        self.sink = sink
+
+    def __call__(self, event: JobEvent) -> None:
+        job_event = {
+            "type": EVENT_NAMES.get(event.code, str(event.code)),
+            "job_id": event.job_id,
+        }
+
+        if isinstance(event, JobSubmissionEvent):
+            now = time.monotonic()
+            for run_time in event.scheduled_run_times:
+                self.running[(event.job_id, run_time)] = now
+            while len(self.running) > MAX_TRACKED_RUNS:
+                self.running.popitem(last=False)
+            job_event["lag"] = self._lag(event.scheduled_run_times[0])
+
+        elif isinstance(event, JobExecutionEvent):
+            job_event["scheduled_run_time"] = event.scheduled_run_time
+            submitted_at = self.running.pop(
+                (event.job_id, event.scheduled_run_time), None
+            )
+            if submitted_at is not None:
+                job_event["duration"] = round(time.monotonic() - submitted_at, 3)
+            if event.code == EVENT_JOB_MISSED:
+                job_event["lag"] = self._lag(event.scheduled_run_time)
+            if event.exception:
+                job_event["exception"] = repr(event.exception)
+
+        self.emit(job_event)
+
+    def emit(self, job_event: dict[str, Any]) -> None:
+        """
+        Передаёт событие в приёмник (в том числе события самого планировщика,
+        например метрики догоняющих запусков после старта).
+        """
+        try:
+            self.sink(job_event)
+        except Exception as e:
+            print(f"Error handling job event {job_event}: {e}")
+
+    @staticmethod
+    def _lag(scheduled_run_time: datetime.datetime) -> float:
+        """
+        Насколько позже запланированного времени произошло событие (сек.)
+        """
+        now = datetime.datetime.now(scheduled_run_time.tzinfo)
+        return round((now - scheduled_run_time).total_seconds(), 3)
+
+
+job_event_pipeline = JobEventPipeline()
@@ -0,0 +1,77 @@
+import os
+import zlib
+
+# Окно (мин.), в котором разносятся запуски постов с одинаковым временем,
+# 0 - посты запускаются точно по расписанию. Пользователь может задать
+# своё окно (User.schedule_spread_minutes)
+SCHEDULE_SPREAD_MINUTES = int(os.getenv("SCHEDULE_SPREAD_MINUTES", "0"))
+# Минимальный интервал между постами с одинаковым временем, которые
+# уходят в один и тот же канал (любых пользователей), сек.
+CHANNEL_MIN_SPACING = int(os.getenv("CHANNEL_MIN_SPACING", "60"))
+# Наибольшее окно разнесения, которое может выбрать пользователь (мин.)
+MAX_SCHEDULE_SPREAD_MINUTES = 120
+
+
+def get_spread_offset(
+    user_id: int, slot: int, window_minutes: int | None = None
+) -> int:
+    """
+    Сдвиг запуска поста внутри окна (сек.). У каждого пользователя своя
+    точка в окне (crc32 от ID), поэтому пользователи не стартуют в одну
+    секунду; slot-й сдвиг отстоит от неё на slot * CHANNEL_MIN_SPACING.
+    :param user_id: ID пользователя.
+    :param slot: Номер сдвига внутри окна.
+    :param window_minutes: Окно пользователя, None - SCHEDULE_SPREAD_MINUTES.
+    """
+    if window_minutes is None:
+        window_minutes = SCHEDULE_SPREAD_MINUTES
+    window = window_minutes * 60
+    if window <= 0:
+        return 0
+    base = zlib.crc32(str(user_id).encode()) % window
+    return (base + slot * CHANNEL_MIN_SPACING) % window
+
+
+def assign_spread_offsets(
+    posts: list[tuple[int, int, set[str], int | None]],
+) -> dict[int, int]:
+    """
+    Сдвиги запуска постов с одинаковым временем рассылки. Посты разбираются
+    по возрастанию ID, каждому берётся первый сдвиг своего окна, который
+    отстоит не меньше чем на CHANNEL_MIN_SPACING от сдвигов уже разобранных
+    постов с общими каналами. Результат для поста зависит только от постов
+    с меньшим ID, поэтому не меняется при добавлении новых постов.
+    :param posts: (ID поста, ID пользователя, chat_id каналов поста,
+        окно пользователя в минутах или None).
+    :return: ID поста -> сдвиг (сек.).
+    """
+    offsets: dict[int, int] = {}
+    assigned: list[tuple[set[str], int]] = []
+    for post_id, user_id, chat_ids, window_minutes in sorted(posts):
+        taken = [
+            offset for other_chat_ids, offset in assigned if other_chat_ids & chat_ids
+        ]
+        window = (
+            SCHEDULE_SPREAD_MINUTES if window_minutes is None else window_minutes
+        ) * 60
+        offset = None
+        for slot in range(max(window // CHANNEL_MIN_SPACING, 1)):
+            candidate = get_spread_offset(user_id, slot, window_minutes)
+            if all(abs(candidate - other) >= CHANNEL_MIN_SPACING for other in taken):
+                offset = candidate
+                break
+        if offset is None:
+            # Окно меньше, чем нужно для всех постов канала
+            offset = get_spread_offset(user_id, len(taken), window_minutes)
+        offsets[post_id] = offset
+        assigned.append((chat_ids, offset))
+    return offsets
+
+
+def shift_time_of_day(hour: int, minute: int, offset: int) -> tuple[int, int, int]:
+    """
+    Сдвигает время суток на offset секунд.
+    :return: Часы, минуты и секунды.
+    """
+    total = (hour * 3600 + minute * 60 + offset) % 86400
+    return total // 3600, total % 3600 // 60, total % 60
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv(".env.app")
+
+from bot import bot
+from models import create_all
+from utils.delivery import run_delivery_worker
+from utils.scheduler import deliver_post, start_scheduler
+
+
+async def main() -> None:
+    """
+    Воркер рассылки (PROCESS_ROLE=worker): планировщик и доставка постов
+    из очереди, без polling. Процессов может быть несколько - задачи
+    запускает ведущий, очередь делится между всеми.
+    """
+    await create_all()
+    start_scheduler()
+    try:
+        await run_delivery_worker(deliver_post)
+    finally:
+        await bot.session.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    asyncio.run(main())